@@ -0,0 +1,63 @@
+# File: benchmarks/bench_classifier.py
+"""
+Compare the single-pass classify_curve against the cascade of independent
+match_* tests on synthetic lines, circles, ellipses and freehand strokes.
+
+    python benchmarks/bench_classifier.py [--curves 2000]
+"""
+
+import os
+import sys
+import argparse
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from curve_regularization import classify_curve, match_line, match_circle, match_ellipse, match_rectangle
+
+def cascade(points):
+    """Classify the way regularize_curve did before the single-pass classifier."""
+    for curve_type, match in (("line", match_line), ("circle", match_circle),
+                              ("ellipse", match_ellipse), ("rectangle", match_rectangle)):
+        if match(points) is not None:
+            return curve_type
+    return "unknown"
+
+def make_curves(kind, count, rng):
+    curves = []
+    for n in rng.integers(8, 200, count):
+        t = np.linspace(0, 2*np.pi, n, endpoint=False)
+        if kind == "line":
+            curve = np.column_stack([t, 0.5*t + 3])
+        elif kind == "circle":
+            curve = np.column_stack([20 + 10*np.cos(t), 5 + 10*np.sin(t)])
+        elif kind == "ellipse":
+            curve = np.column_stack([20 + 15*np.cos(t), 5 + 6*np.sin(t)])
+        else:
+            curve = np.cumsum(rng.normal(size=(n, 2)), axis=0)
+        curves.append(curve + rng.normal(scale=0.005, size=curve.shape))
+    return curves
+
+def timed(func, curves):
+    start = time.perf_counter()
+    types = [func(curve) for curve in curves]
+    return time.perf_counter() - start, types
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--curves', type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'input':<10} {'cascade (us/curve)':>19} {'classifier (us/curve)':>22} {'speedup':>8}")
+    for kind in ("line", "circle", "ellipse", "freehand"):
+        curves = make_curves(kind, args.curves, rng)
+        cascade_time, cascade_types = timed(cascade, curves)
+        classifier_time, classifier_types = timed(lambda points: classify_curve(points)[0]["type"], curves)
+        assert cascade_types == classifier_types, f"classifications differ on {kind} input"
+        print(f"{kind:<10} {cascade_time / len(curves) * 1e6:>19.1f} "
+              f"{classifier_time / len(curves) * 1e6:>22.1f} {cascade_time / classifier_time:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
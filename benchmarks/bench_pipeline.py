@@ -0,0 +1,191 @@
+# File: benchmarks/bench_pipeline.py
+"""
+Time every pipeline stage on synthetic drawings and record accuracy next to
+throughput.
+
+Each configuration (number of curves, canvas size) generates a drawing with
+known ground truth and times png_to_polylines on its rendered PNG, plus
+read_csv, process_paths, process_symmetry, process_occlusions and
+visualize_results on the ground-truth polylines. Results are written as JSON
+and can be compared against a saved baseline to catch regressions.
+
+    python benchmarks/bench_pipeline.py --preset smoke
+    python benchmarks/bench_pipeline.py --curves 10 1000 100000 --canvas 1024 16384
+    python benchmarks/bench_pipeline.py --preset smoke --save-baseline
+    python benchmarks/bench_pipeline.py --preset smoke --compare
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import numpy as np
+import cv2
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from synthetic import make_drawing, render_drawing
+from instrumentation import PipelineProfiler
+from polyline_store import PolylineStore
+from png_processor import png_to_polylines
+from curve_regularization import read_csv, process_paths
+from symmetry_detection import process_symmetry
+from curve_completion import process_occlusions
+from visualization import visualize_results
+
+PRESETS = {
+    'smoke': {'curves': [10, 100], 'canvas': [512, 1024]},
+    'default': {'curves': [10, 100, 1000, 10000], 'canvas': [1024, 4096]},
+    'full': {'curves': [10, 100, 1000, 10000, 100000], 'canvas': [1024, 4096, 16384]},
+}
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+BENCH_STAGES = ('png_to_polylines', 'read_csv', 'process_paths', 'process_symmetry',
+                'process_occlusions', 'visualize_results')
+
+def _accuracy(shapes, regularized_paths, symmetry_results):
+    curves = [path[0] for path in regularized_paths]
+    correct = [shape['type'] == curve['type'] for shape, curve in zip(shapes, curves)]
+    by_kind = {}
+    for shape, ok in zip(shapes, correct):
+        by_kind.setdefault(shape['kind'], []).append(ok)
+    stars = [(shape['order'], symmetry[0]['rotation'])
+             for shape, symmetry in zip(shapes, symmetry_results) if 'order' in shape]
+    return {
+        'classification': float(np.mean(correct)) if correct else None,
+        'classification_by_kind': {kind: float(np.mean(oks)) for kind, oks in by_kind.items()},
+        'star_rotation_order': float(np.mean([order == found for order, found in stars])) if stars else None,
+    }
+
+def run_config(num_curves, canvas_size, work_dir, seed=0, visualize_limit=2000):
+    """Benchmark one drawing; returns a result dict with per-stage timings and accuracy."""
+    shapes = make_drawing(num_curves, canvas_size, seed=seed)
+    png_path = os.path.join(work_dir, f"synthetic_{num_curves}_{canvas_size}.png")
+    cv2.imwrite(png_path, render_drawing(shapes, canvas_size))
+    csv_path = os.path.join(work_dir, f"synthetic_{num_curves}_{canvas_size}.csv")
+    PolylineStore.from_polylines([shape['points'] for shape in shapes]).to_csv(csv_path)
+
+    profiler = PipelineProfiler()
+    with profiler.stage('png_to_polylines') as record:
+        # The nested raster stages are recorded by the same profiler
+        record['items'] = len(png_to_polylines(png_path, profiler=profiler))
+    with profiler.stage('read_csv') as record:
+        paths = read_csv(csv_path)
+        record['items'] = len(paths)
+    with profiler.stage('process_paths') as record:
+        regularized_paths = process_paths(paths)
+        record['items'] = len(paths)
+    with profiler.stage('process_symmetry') as record:
+        symmetry_results = process_symmetry(regularized_paths)
+        record['items'] = len(paths)
+    with profiler.stage('process_occlusions') as record:
+        completed_paths = process_occlusions(regularized_paths)
+        record['items'] = len(paths)
+    if num_curves <= visualize_limit:
+        with profiler.stage('visualize_results') as record:
+            visualize_results(completed_paths, os.path.join(work_dir, 'results.png'), verbose=False)
+            record['items'] = len(paths)
+
+    stages = {}
+    for record in profiler.records:
+        stages[record['stage']] = {
+            'seconds': record['wall_seconds'],
+            'items': record.get('items'),
+            'items_per_second': record['items'] / record['wall_seconds']
+            if record.get('items') and record['wall_seconds'] > 0 else None,
+        }
+    return {
+        'name': f"{num_curves}x{canvas_size}",
+        'curves': num_curves,
+        'canvas': canvas_size,
+        'stages': stages,
+        'accuracy': _accuracy(shapes, regularized_paths, symmetry_results),
+    }
+
+def run_suite(curve_counts, canvas_sizes, seed=0, visualize_limit=2000, log=print):
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for canvas_size in canvas_sizes:
+            for num_curves in curve_counts:
+                try:
+                    result = run_config(num_curves, canvas_size, work_dir, seed, visualize_limit)
+                except ValueError as e:
+                    log(f"skipping {num_curves}x{canvas_size}: {e}")
+                    continue
+                results.append(result)
+                log(format_result(result))
+    return {
+        'machine': {'python': platform.python_version(), 'platform': platform.platform(),
+                    'numpy': np.__version__, 'opencv': cv2.__version__},
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+
+def format_result(result):
+    timings = ', '.join(f"{stage} {result['stages'][stage]['seconds']:.3f}s"
+                        for stage in BENCH_STAGES if stage in result['stages'])
+    accuracy = result['accuracy']
+    return (f"{result['name']:>14}: {timings}; classification {accuracy['classification']:.2f}, "
+            f"star order {accuracy['star_rotation_order'] if accuracy['star_rotation_order'] is not None else '-'}")
+
+def compare(current, baseline, tolerance=0.25, min_seconds=0.05):
+    """
+    List regressions: stages slower than the baseline by more than tolerance
+    (ignoring stages under min_seconds) and any drop in classification accuracy.
+    """
+    previous = {result['name']: result for result in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        before = previous.get(result['name'])
+        if before is None:
+            continue
+        for stage, timing in result['stages'].items():
+            old = before['stages'].get(stage)
+            if old and max(old['seconds'], timing['seconds']) >= min_seconds and \
+                    timing['seconds'] > old['seconds'] * (1 + tolerance):
+                regressions.append(f"{result['name']} {stage}: {old['seconds']:.3f}s -> {timing['seconds']:.3f}s")
+        old_accuracy = before['accuracy']['classification']
+        new_accuracy = result['accuracy']['classification']
+        if old_accuracy is not None and new_accuracy is not None and new_accuracy < old_accuracy:
+            regressions.append(f"{result['name']} classification accuracy: {old_accuracy:.3f} -> {new_accuracy:.3f}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='smoke')
+    parser.add_argument('--curves', type=int, nargs='+', help="Override the preset curve counts")
+    parser.add_argument('--canvas', type=int, nargs='+', help="Override the preset canvas sizes in pixels")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--visualize-limit', type=int, default=2000,
+                        help="Skip visualize_results above this many curves")
+    parser.add_argument('--output', help="Write the results JSON here")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help="Overwrite the baseline with these results")
+    parser.add_argument('--compare', action='store_true', help="Exit non-zero on regressions against the baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed relative slowdown per stage")
+    args = parser.parse_args()
+
+    preset = PRESETS[args.preset]
+    results = run_suite(args.curves or preset['curves'], args.canvas or preset['canvas'],
+                        seed=args.seed, visualize_limit=args.visualize_limit)
+
+    for path in filter(None, [args.output, args.baseline if args.save_baseline else None]):
+        with open(path, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {path}")
+
+    if args.compare:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against baseline.")
+
+if __name__ == "__main__":
+    main()
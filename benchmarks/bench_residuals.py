@@ -0,0 +1,67 @@
+# File: benchmarks/bench_residuals.py
+"""
+Compare per-point residual loops against the array-level residual functions of
+curve_regularization on noisy circles of 10^2 to 10^5 points.
+
+    python benchmarks/bench_residuals.py [--repeat 5]
+"""
+
+import os
+import sys
+import argparse
+import timeit
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from curve_regularization import (
+    fit_line, fit_circle, fit_ellipse, fit_rectangle,
+    distance_point_line, distance_point_circle, distance_point_ellipse, distance_point_rectangle,
+    line_distances, circle_distances, ellipse_distances, rectangle_distances,
+)
+
+SIZES = [10**2, 10**3, 10**4, 10**5]
+
+def make_points(n, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.linspace(0, 2*np.pi, n, endpoint=False)
+    points = np.column_stack([50 + 20*np.cos(t), 40 + 20*np.sin(t)])
+    return points + rng.normal(scale=0.05, size=points.shape)
+
+def shape_cases(points):
+    return [
+        ('line', fit_line(points), distance_point_line, line_distances),
+        ('circle', fit_circle(points), distance_point_circle, circle_distances),
+        ('ellipse', fit_ellipse(points), distance_point_ellipse, ellipse_distances),
+        ('rectangle', fit_rectangle(points), distance_point_rectangle, rectangle_distances),
+    ]
+
+def best_time(func, repeat):
+    number = 1
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+def run(sizes=SIZES, repeat=5):
+    results = []
+    for n in sizes:
+        points = make_points(n)
+        for name, params, per_point, vectorized in shape_cases(points):
+            loop_time = best_time(lambda: np.max([per_point(p, params) for p in points]), repeat)
+            array_time = best_time(lambda: np.max(vectorized(points, params)), repeat)
+            assert np.isclose(np.max([per_point(p, params) for p in points]), np.max(vectorized(points, params)))
+            results.append({'shape': name, 'points': n, 'loop_seconds': loop_time,
+                            'vectorized_seconds': array_time, 'speedup': loop_time / array_time})
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    args = parser.parse_args()
+
+    print(f"{'shape':<10} {'points':>8} {'loop (ms)':>12} {'vectorized (ms)':>16} {'speedup':>9}")
+    for result in run(args.sizes, args.repeat):
+        print(f"{result['shape']:<10} {result['points']:>8} {result['loop_seconds']*1e3:>12.3f} "
+              f"{result['vectorized_seconds']*1e3:>16.3f} {result['speedup']:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
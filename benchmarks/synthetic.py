@@ -0,0 +1,101 @@
+# File: benchmarks/synthetic.py
+"""
+Synthetic drawings with known ground truth for the benchmark suite.
+
+Each drawing is a list of shape dicts {'kind', 'type', 'points', ...} laid out
+on a square canvas, one shape per grid cell, plus a rendered grayscale image.
+'type' is the curve type the regularizer is expected to report; star shapes
+also carry their rotational symmetry 'order'.
+"""
+
+import numpy as np
+import cv2
+
+SHAPE_KINDS = ('line', 'circle', 'ellipse', 'rectangle', 'occluded_arc', 'freehand', 'star')
+
+# Curve type the regularizer should report for each kind of shape
+EXPECTED_TYPES = {
+    'line': 'line',
+    'circle': 'circle',
+    'ellipse': 'ellipse',
+    'rectangle': 'rectangle',
+    'occluded_arc': 'circle',
+    'freehand': 'unknown',
+    'star': 'unknown',
+}
+
+MIN_CELL_SIZE = 16
+
+def _resample(points, spacing):
+    """Resample a polyline to roughly uniform arc-length spacing."""
+    lengths = np.concatenate([[0], np.cumsum(np.hypot(*np.diff(points, axis=0).T))])
+    num = max(int(lengths[-1] / spacing) + 1, 8)
+    samples = np.linspace(0, lengths[-1], num)
+    return np.column_stack([np.interp(samples, lengths, points[:, 0]), np.interp(samples, lengths, points[:, 1])])
+
+def _rotate(points, angle):
+    c, s = np.cos(angle), np.sin(angle)
+    return points @ np.array([[c, -s], [s, c]]).T
+
+def make_shape(kind, center, size, rng, spacing=1.5):
+    """One shape of the given kind fitting in a cell of the given size around center."""
+    radius = size * rng.uniform(0.25, 0.42)
+    angle = rng.uniform(0, np.pi)
+    shape = {'kind': kind, 'type': EXPECTED_TYPES[kind]}
+    if kind == 'line':
+        direction = np.array([np.cos(angle), np.sin(angle)])
+        points = np.linspace(-radius, radius, 2)[:, None] * direction
+    elif kind in ('circle', 'occluded_arc'):
+        sweep = 2*np.pi if kind == 'circle' else rng.uniform(1.1, 1.6) * np.pi
+        t = np.linspace(angle, angle + sweep, 400)
+        points = radius * np.column_stack([np.cos(t), np.sin(t)])
+        shape['params'] = (center[0], center[1], radius)
+    elif kind == 'ellipse':
+        t = np.linspace(0, 2*np.pi, 400)
+        points = _rotate(np.column_stack([radius * np.cos(t), radius * rng.uniform(0.35, 0.7) * np.sin(t)]), angle)
+    elif kind == 'rectangle':
+        w, h = radius, radius * rng.uniform(0.4, 0.9)
+        corners = np.array([[-w, -h], [w, -h], [w, h], [-w, h], [-w, -h]])
+        points = _rotate(corners, angle)
+    elif kind == 'freehand':
+        steps = rng.normal(size=(60, 2))
+        steps = np.cumsum(np.cumsum(steps, axis=0), axis=0)
+        steps -= steps.mean(axis=0)
+        points = steps / max(np.abs(steps).max(), 1e-9) * radius
+    elif kind == 'star':
+        order = int(rng.integers(3, 9))
+        t = np.linspace(0, 2*np.pi, 60 * order, endpoint=False)
+        r = radius * (1 + 0.3 * np.cos(order * t)) / 1.3
+        points = np.column_stack([r * np.cos(t + angle), r * np.sin(t + angle)])
+        shape['order'] = order
+    else:
+        raise ValueError(f"Unknown shape kind: {kind}")
+    shape['points'] = _resample(points, spacing) + center
+    return shape
+
+def make_drawing(num_curves, canvas_size, seed=0, kinds=SHAPE_KINDS, noise=0.01):
+    """
+    Lay out num_curves shapes cycling through kinds on a canvas_size square canvas.
+    Returns the shapes with slightly noisy points, or raises ValueError if the
+    grid cells would be smaller than MIN_CELL_SIZE pixels.
+    """
+    rng = np.random.default_rng(seed)
+    per_row = int(np.ceil(np.sqrt(num_curves)))
+    cell = canvas_size / per_row
+    if cell < MIN_CELL_SIZE:
+        raise ValueError(f"{num_curves} curves do not fit on a {canvas_size}px canvas")
+    shapes = []
+    for i in range(num_curves):
+        row, col = divmod(i, per_row)
+        center = np.array([(col + 0.5) * cell, (row + 0.5) * cell])
+        shape = make_shape(kinds[i % len(kinds)], center, cell, rng)
+        shape['points'] = shape['points'] + rng.normal(scale=noise, size=shape['points'].shape)
+        shapes.append(shape)
+    return shapes
+
+def render_drawing(shapes, canvas_size, thickness=2):
+    """Rasterize shapes as dark strokes on a white grayscale canvas."""
+    image = np.full((canvas_size, canvas_size), 255, dtype=np.uint8)
+    strokes = [np.round(shape['points']).astype(np.int32) for shape in shapes]
+    cv2.polylines(image, strokes, isClosed=False, color=0, thickness=thickness)
+    return image
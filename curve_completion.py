@@ -2,104 +2,198 @@
 
 import numpy as np
 from scipy import interpolate
-from curve_regularization import is_circle, fit_circle, is_ellipse, fit_ellipse
+from scipy.spatial import cKDTree
+from curve_regularization import match_circle, fit_circle, match_ellipse, fit_ellipse
+from curve_model import Curve
+from polyline_store import PolylineStore
+from curve_sampling import DEFAULT_TOLERANCE, sample_circle, sample_ellipse, sample_spline, sample_arc
 
-def complete_circle(partial_points):
+def complete_circle(partial_points, circle_params=None, tolerance=DEFAULT_TOLERANCE):
     """
-    Complete a partially occluded circle.
+    Complete a partially occluded circle, reusing circle_params when already fitted.
     """
     if len(partial_points) < 3:
         return None  # Not enough points to determine a circle
 
-    center, radius = fit_circle(partial_points)
+    if circle_params is None:
+        circle_params = fit_circle(partial_points)
     
     # Generate points to complete the circle
-    theta = np.linspace(0, 2*np.pi, 100)
-    completed_points = np.array([
-        center[0] + radius * np.cos(theta),
-        center[1] + radius * np.sin(theta)
-    ]).T
-    
-    return completed_points
+    return sample_circle(circle_params, tolerance)
 
-def complete_ellipse(partial_points):
+def complete_ellipse(partial_points, ellipse_params=None, tolerance=DEFAULT_TOLERANCE):
     """
-    Complete a partially occluded ellipse.
+    Complete a partially occluded ellipse, reusing ellipse_params when already fitted.
     """
     if len(partial_points) < 5:
         return None  # Not enough points to determine an ellipse
 
-    center, axes, angle = fit_ellipse(partial_points)
+    if ellipse_params is None:
+        ellipse_params = fit_ellipse(partial_points)
     
     # Generate points to complete the ellipse
-    theta = np.linspace(0, 2*np.pi, 100)
-    a, b = axes
-    rotation = np.array([
-        [np.cos(angle), -np.sin(angle)],
-        [np.sin(angle), np.cos(angle)]
-    ])
-    
-    ellipse_points = np.dot(
-        np.array([a * np.cos(theta), b * np.sin(theta)]).T,
-        rotation.T
-    )
-    completed_points = ellipse_points + center
-    
-    return completed_points
+    return sample_ellipse(ellipse_params, tolerance)
 
-def complete_curve_spline(partial_points, num_points=100):
+def complete_curve_spline(partial_points, num_points=None, tolerance=DEFAULT_TOLERANCE):
     """
-    Complete a partially occluded curve using spline interpolation.
+    Complete a partially occluded curve using spline interpolation, sampled to
+    tolerance unless a fixed num_points is given.
     """
     if len(partial_points) < 2:
         return None  # Not enough points for interpolation
 
-    # Parameterize the curve
-    t = np.linspace(0, 1, len(partial_points))
-    
     # Fit a spline to the partial points
     tck, u = interpolate.splprep([partial_points[:, 0], partial_points[:, 1]], s=0)
     
     # Generate more points along the spline
-    new_points = interpolate.splev(np.linspace(0, 1, num_points), tck)
-    
-    return np.column_stack(new_points)
+    if num_points is not None:
+        return np.column_stack(interpolate.splev(np.linspace(0, 1, num_points), tck))
+    return sample_spline(tck, tolerance)
 
-def complete_curve(partial_points):
+def complete_curve(partial_points, tolerance=DEFAULT_TOLERANCE):
     """
     Complete a partially occluded curve based on its detected shape.
     If completion is not possible, return the original points.
     """
-    if is_circle(partial_points):
-        completed = complete_circle(partial_points)
-    elif is_ellipse(partial_points):
-        completed = complete_ellipse(partial_points)
+    circle_params = match_circle(partial_points)
+    if circle_params is not None:
+        completed = complete_circle(partial_points, circle_params, tolerance)
     else:
-        completed = complete_curve_spline(partial_points)
+        ellipse_params = match_ellipse(partial_points)
+        if ellipse_params is not None:
+            completed = complete_ellipse(partial_points, ellipse_params, tolerance)
+        else:
+            completed = complete_curve_spline(partial_points, tolerance=tolerance)
     
     return completed if completed is not None else partial_points
 
-def process_occlusions(regularized_paths):
+def curve_ends(store, tangent_points=3, closed_tolerance=2.0):
     """
-    Process occlusions for all regularized paths.
+    Endpoints of the open curves in a PolylineStore with their outward unit
+    tangents, estimated from the point tangent_points steps inside the curve.
+    Returns (curve_ids, ends, positions, tangents), where ends is 0 for the first
+    point and 1 for the last. Curves whose ends lie within closed_tolerance of
+    each other are treated as closed and skipped.
     """
-    completed_paths = []
-    for path in regularized_paths:
-        completed_path = []
-        for curve in path:
-            if curve['type'] == 'unknown':
-                completed_curve = complete_curve(curve['points'])
-                completed_path.append({
-                    'type': 'completed' if np.any(completed_curve != curve['points']) else 'unknown',
-                    'original': curve,
-                    'completed_points': completed_curve
-                })
-            else:
-                completed_path.append(curve)
-        completed_paths.append(completed_path)
-    return completed_paths
+    starts, stops = store.curve_offsets[:-1], store.curve_offsets[1:] - 1
+    open_curves = np.flatnonzero(stops - starts >= 1)
+    coords = store.coords
+    gaps = np.hypot(*(coords[stops[open_curves]] - coords[starts[open_curves]]).T)
+    open_curves = open_curves[gaps > closed_tolerance]
+    first, last = starts[open_curves], stops[open_curves]
+    steps = np.minimum(tangent_points, last - first)
+    positions = np.concatenate([coords[first], coords[last]])
+    inner = np.concatenate([coords[first + steps], coords[last - steps]])
+    tangents = positions - inner
+    lengths = np.hypot(*tangents.T)
+    tangents /= np.where(lengths > 0, lengths, 1.0)[:, None]
+    curve_ids = np.concatenate([open_curves, open_curves])
+    ends = np.repeat([0, 1], len(open_curves))
+    return curve_ids, ends, positions, tangents
+
+def hermite_bridge(start, start_tangent, end, end_tangent, spacing=1.0):
+    """
+    Cubic Hermite curve from start to end leaving start along start_tangent and
+    entering end against end_tangent, both outward unit tangents of the fragments.
+    """
+    gap = np.hypot(*(end - start))
+    t = np.linspace(0, 1, max(int(np.ceil(gap / spacing)), 1) + 1)[:, None]
+    h00, h10 = 2*t**3 - 3*t**2 + 1, t**3 - 2*t**2 + t
+    h01, h11 = -2*t**3 + 3*t**2, t**3 - t**2
+    return h00*start + h10*gap*start_tangent + h01*end + h11*gap*(-end_tangent)
+
+def arc_bridge(start, start_tangent, end, circle_params, tolerance=DEFAULT_TOLERANCE):
+    """Arc of the fitted circle from start to end, continuing in the direction of start_tangent."""
+    xc, yc, radius = circle_params
+    a0 = np.arctan2(start[1] - yc, start[0] - xc)
+    a1 = np.arctan2(end[1] - yc, end[0] - xc)
+    # Counter-clockwise when the tangent turns left of the radius vector
+    ccw = (start[0] - xc) * start_tangent[1] - (start[1] - yc) * start_tangent[0] > 0
+    sweep = (a1 - a0) % (2*np.pi) if ccw else -((a0 - a1) % (2*np.pi))
+    return sample_arc((xc, yc), radius, a0, sweep, tolerance)
+
+def _same_circle(a, b, relative_tolerance=0.05):
+    """Whether two curves are fitted circles or arcs with matching centres and radii."""
+    if a['type'] not in ('circle', 'arc') or b['type'] not in ('circle', 'arc'):
+        return False
+    tolerance = max(1.0, relative_tolerance * a['params'][2])
+    return np.hypot(a['params'][0] - b['params'][0], a['params'][1] - b['params'][1]) < tolerance and \
+        abs(a['params'][2] - b['params'][2]) < tolerance
+
+def find_bridges(regularized_paths, max_gap=20.0, max_angle=np.pi/4, tangent_points=3):
     """
-    Process occlusions for all regularized paths.
+    Pair up fragment endpoints across an occluder and bridge them. Endpoints
+    are indexed in a KD-tree, so only pairs within max_gap are examined. A
+    pair qualifies when each outward tangent points at the other endpoint
+    within max_angle. Consecutive segments of a segmented stroke count as one
+    fragment, with only the stroke's outer ends. Pairs are matched greedily by gap length plus tangent
+    misalignment, using each endpoint at most once. Two fragments of the same
+    fitted circle are joined along that circle, and other pairs with a cubic
+    Hermite spline.
+
+    Returns a list of 'bridge' Curve records. Each one's params hold the
+    ((path, curve, end), (path, curve, end)) indices of the joined endpoints,
+    and its completed_points hold the bridge.
+    """
+    curves = [curve for path in regularized_paths for curve in path]
+    store = PolylineStore.from_paths([[curve['points'] for curve in path] for path in regularized_paths])
+    curve_path = np.repeat(np.arange(store.num_paths), np.diff(store.path_offsets))
+    curve_in_path = np.arange(store.num_curves) - store.path_offsets[curve_path]
+    # Consecutive segments of one segmented stroke share their breakpoint, so
+    # only the outer ends of a stroke are fragment ends
+    joins_previous = np.zeros(store.num_curves + 1, dtype=bool)
+    if store.num_curves > 1:
+        starts, stops = store.curve_offsets[1:-1], store.curve_offsets[1:-1] - 1
+        joins_previous[1:-1] = (curve_path[1:] == curve_path[:-1]) & \
+            np.all(store.coords[starts] == store.coords[stops], axis=1) & (np.diff(store.curve_offsets)[1:] > 0)
+    stroke = np.cumsum(~joins_previous[:-1])
+    curve_ids, ends, positions, tangents = curve_ends(store, tangent_points)
+    outer = ~np.where(ends == 0, joins_previous[curve_ids], joins_previous[curve_ids + 1])
+    curve_ids, ends, positions, tangents = curve_ids[outer], ends[outer], positions[outer], tangents[outer]
+    if len(positions) < 2:
+        return []
+
+    pairs = cKDTree(positions).query_pairs(max_gap, output_type='ndarray')
+    a, b = pairs[:, 0], pairs[:, 1]
+    pairs = pairs[stroke[curve_ids[a]] != stroke[curve_ids[b]]]
+    a, b = pairs[:, 0], pairs[:, 1]
+    gap = positions[b] - positions[a]
+    distance = np.hypot(*gap.T)
+    direction = gap / np.where(distance > 0, distance, 1.0)[:, None]
+    cos_a = np.einsum('ij,ij->i', tangents[a], direction)
+    cos_b = -np.einsum('ij,ij->i', tangents[b], direction)
+    # Touching endpoints have no gap direction; only the tangents must oppose
+    touching = distance == 0
+    opposed = -np.einsum('ij,ij->i', tangents[a], tangents[b])
+    cos_a[touching] = cos_b[touching] = opposed[touching]
+    compatible = (cos_a > np.cos(max_angle)) & (cos_b > np.cos(max_angle))
+    cost = distance + max_gap * ((1 - cos_a) + (1 - cos_b))
+
+    bridges = []
+    used = np.zeros(len(positions), dtype=bool)
+    for k in np.flatnonzero(compatible)[np.argsort(cost[compatible], kind='stable')]:
+        i, j = a[k], b[k]
+        if used[i] or used[j]:
+            continue
+        used[i] = used[j] = True
+        first, second = curves[curve_ids[i]], curves[curve_ids[j]]
+        if _same_circle(first, second):
+            points = arc_bridge(positions[i], tangents[i], positions[j], first['params'])
+        else:
+            points = hermite_bridge(positions[i], tangents[i], positions[j], tangents[j])
+        links = tuple((int(curve_path[c]), int(curve_in_path[c]), int(end))
+                      for c, end in ((curve_ids[i], ends[i]), (curve_ids[j], ends[j])))
+        bridge = Curve('bridge', links)
+        bridge['completed_points'] = points
+        bridges.append(bridge)
+    return bridges
+
+def process_occlusions(regularized_paths, bridge=True, max_gap=20.0, max_angle=np.pi/4):
+    """
+    Process occlusions for all regularized paths. Unknown curves are completed
+    on their own. With bridge=True, fragments split by an occluder are also
+    joined with find_bridges, and each bridge is appended to the path of its
+    first fragment.
     """
     completed_paths = []
     for path in regularized_paths:
@@ -107,12 +201,12 @@ def process_occlusions(regularized_paths):
         for curve in path:
             if curve['type'] == 'unknown':
                 completed_curve = complete_curve(curve['points'])
-                completed_path.append({
-                    'type': 'completed',
-                    'original': curve,
-                    'completed_points': completed_curve
-                })
+                completed_type = 'completed' if completed_curve is not curve['points'] else 'unknown'
+                completed_path.append(Curve.completion(curve, completed_curve, completed_type))
             else:
                 completed_path.append(curve)
         completed_paths.append(completed_path)
-    return completed_paths
\ No newline at end of file
+    if bridge:
+        for curve in find_bridges(regularized_paths, max_gap, max_angle):
+            completed_paths[curve['params'][0][0]].append(curve)
+    return completed_paths
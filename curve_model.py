@@ -0,0 +1,127 @@
+# File: curve_model.py
+
+import numpy as np
+from polyline_store import PolylineStore
+
+CURVE_TYPES = ("unknown", "line", "circle", "ellipse", "rectangle", "arc", "elliptic_arc")
+CURVE_TYPE_CODES = {curve_type: code for code, curve_type in enumerate(CURVE_TYPES)}
+PARAM_WIDTHS = {"line": 3, "circle": 3, "ellipse": 5, "rectangle": 5, "arc": 3, "elliptic_arc": 5}
+PARAM_WIDTH = 5
+
+class SlotRecord:
+    """
+    Base for compact records that keep the dict interface of the structures they
+    replace: record['key'], record.get('key'), 'key' in record and keys().
+    Fields that were never assigned behave like missing dict keys.
+    """
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        if key not in self.__slots__ or not hasattr(self, key):
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.__slots__ and hasattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def keys(self):
+        return [key for key in self.__slots__ if hasattr(self, key)]
+
+    def items(self):
+        return [(key, getattr(self, key)) for key in self.keys()]
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def __repr__(self):
+        fields = ', '.join(f"{key}={value!r}" for key, value in self.items() if not isinstance(value, np.ndarray))
+        return f"{type(self).__name__}({fields})"
+
+class Curve(SlotRecord):
+    """
+    A regularized curve: its type, fitted parameters (None for unknown curves)
+    and the points it was fitted to. Completed curves instead carry the
+    original curve and the completed_points, as the dicts they replace did.
+    """
+    __slots__ = ('type', 'params', 'points', 'original', 'completed_points')
+
+    def __init__(self, type, params=None, points=None):
+        self.type = type
+        self.params = params
+        self.points = points
+
+    @classmethod
+    def completion(cls, original, completed_points, curve_type='completed'):
+        curve = cls.__new__(cls)
+        curve.type = curve_type
+        curve.original = original
+        curve.completed_points = completed_points
+        return curve
+
+class Symmetry(SlotRecord):
+    """Symmetry of one curve: whether it has a reflection axis and its rotational order."""
+    __slots__ = ('reflection', 'rotation')
+
+    def __init__(self, reflection, rotation):
+        self.reflection = reflection
+        self.rotation = rotation
+
+class CurveTable:
+    """
+    Columnar regularized curves for a whole image: the PolylineStore of points,
+    one uint8 type code per curve and a (num_curves, PARAM_WIDTH) parameter
+    array padded with NaN. table[i] builds the Curve for row i on demand, and
+    table['store'], table['type_codes'] and table['params'] keep the keys of
+    the dict that process_paths_batched used to return.
+    """
+    __slots__ = ('store', 'type_codes', 'params')
+
+    def __init__(self, store, type_codes, params):
+        self.store = store
+        self.type_codes = type_codes
+        self.params = params
+
+    @classmethod
+    def from_paths(cls, regularized_paths):
+        """Pack nested regularized curves (Curve objects or dicts) into a table."""
+        curves = [curve for path in regularized_paths for curve in path]
+        store = PolylineStore.from_paths([[curve['points'] for curve in path] for path in regularized_paths])
+        type_codes = np.array([CURVE_TYPE_CODES[curve['type']] for curve in curves], dtype=np.uint8)
+        params = np.full((len(curves), PARAM_WIDTH), np.nan)
+        for i, curve in enumerate(curves):
+            if curve['params'] is not None:
+                params[i, :len(curve['params'])] = curve['params']
+        return cls(store, type_codes, params)
+
+    def __len__(self):
+        return len(self.type_codes)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            if key not in self.__slots__:
+                raise KeyError(key)
+            return getattr(self, key)
+        return self.curve(key)
+
+    @property
+    def types(self):
+        return [CURVE_TYPES[code] for code in self.type_codes]
+
+    def curve(self, index, points=None):
+        curve_type = CURVE_TYPES[self.type_codes[index]]
+        params = tuple(self.params[index, :PARAM_WIDTHS[curve_type]]) if curve_type in PARAM_WIDTHS else None
+        return Curve(curve_type, params, self.store.curve(index) if points is None else points)
+
+    def to_paths(self):
+        """Expand into nested lists of Curve objects whose points are views into the store."""
+        curves = [self.curve(i, points) for i, points in enumerate(self.store.to_polylines())]
+        path_bounds = self.store.path_offsets.tolist()
+        return [curves[start:end] for start, end in zip(path_bounds[:-1], path_bounds[1:])]
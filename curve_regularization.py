@@ -3,35 +3,106 @@ import numpy as np
 from scipy import optimize
 import cv2
 import os
+import math
+import time
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from polyline_store import PolylineStore
+from curve_model import Curve, CurveTable, CURVE_TYPE_CODES, PARAM_WIDTH
+from instrumentation import NULL_PROFILER
+from shared_buffers import SharedArena, call_with_shared
 
-def read_csv(csv_path):
+def _group_rows(rows):
+    """
+    Group path_id,curve_id,x,y rows into a PolylineStore with one stable sort and
+    one boundary pass. Rows keep their file order within each curve.
+    """
+    path_ids, curve_ids = rows[:, 0], rows[:, 1]
+    in_order = np.all((path_ids[1:] > path_ids[:-1]) |
+                      ((path_ids[1:] == path_ids[:-1]) & (curve_ids[1:] >= curve_ids[:-1])))
+    if not in_order:
+        rows = rows[np.lexsort((curve_ids, path_ids))]
+        path_ids, curve_ids = rows[:, 0], rows[:, 1]
+
+    num_rows = len(rows)
+    new_curve = np.ones(num_rows, dtype=bool)
+    new_curve[1:] = (path_ids[1:] != path_ids[:-1]) | (curve_ids[1:] != curve_ids[:-1])
+    curve_starts = np.flatnonzero(new_curve)
+    curve_offsets = np.append(curve_starts, num_rows)
+
+    curve_path_ids = path_ids[curve_starts]
+    new_path = np.ones(len(curve_starts), dtype=bool)
+    new_path[1:] = curve_path_ids[1:] != curve_path_ids[:-1]
+    path_offsets = np.append(np.flatnonzero(new_path), len(curve_starts))
+
+    coords = np.ascontiguousarray(rows[:, 2:])
+    return PolylineStore(coords, curve_offsets, path_offsets)
+
+def _load_rows(source):
+    rows = np.loadtxt(source, delimiter=',', ndmin=2)
+    if rows.shape[1] < 4:
+        raise ValueError("CSV data has incorrect dimensions. Expected path_id,curve_id,x,y columns.")
+    return rows
+
+def _check_csv_path(csv_path):
     if not os.path.exists(csv_path):
         raise FileNotFoundError(f"CSV file not found: {csv_path}")
-    
+
     if os.path.getsize(csv_path) == 0:
         raise ValueError(f"CSV file is empty: {csv_path}")
 
+def read_csv_store(csv_path):
+    """Read a polyline CSV into a PolylineStore backed by a single coordinate array."""
+    _check_csv_path(csv_path)
     try:
-        np_path_XYs = np.genfromtxt(csv_path, delimiter=',')
-        if np_path_XYs.ndim < 2:
-            raise ValueError("CSV data has incorrect dimensions. Expected 2D array.")
-        
-        path_XYs = []
-        for i in np.unique(np_path_XYs[:, 0]):
-            npXYs = np_path_XYs[np_path_XYs[:, 0] == i][:, 1:]
-            XYs = []
-            for j in np.unique(npXYs[:, 0]):
-                XY = npXYs[npXYs[:, 0] == j][:, 1:]
-                XYs.append(XY)
-            path_XYs.append(XYs)
-        return path_XYs
+        return _group_rows(_load_rows(csv_path))
     except Exception as e:
         raise ValueError(f"Error reading CSV file: {str(e)}")
 
-def distance_point_line(point, line_params):
+def read_csv(csv_path):
+    """Read a polyline CSV into a list of paths, each a list of (N, 2) views into one backing array."""
+    return read_csv_store(csv_path).to_paths()
+
+def iter_csv_paths(csv_path, chunk_rows=1000000):
+    """
+    Stream a polyline CSV path by path, parsing at most chunk_rows lines at a time.
+    Rows of a path must be contiguous and path ids non-decreasing, as written by
+    PolylineStore.to_csv, so that memory stays bounded by the chunk size.
+    """
+    _check_csv_path(csv_path)
+    carry = None
+    with open(csv_path, 'r') as f:
+        while True:
+            lines = list(itertools.islice(f, chunk_rows))
+            if not lines:
+                rows, carry = carry, None
+            else:
+                try:
+                    rows = _load_rows(lines)
+                except Exception as e:
+                    raise ValueError(f"Error reading CSV file: {str(e)}")
+                if carry is not None:
+                    rows = np.concatenate([carry, rows])
+                if np.any(rows[1:, 0] < rows[:-1, 0]):
+                    raise ValueError("CSV rows must be grouped by non-decreasing path id for streaming.")
+                # The last path may continue in the next chunk, so hold it back
+                split = np.searchsorted(rows[:, 0], rows[-1, 0], side='left')
+                rows, carry = rows[:split], rows[split:]
+
+            if rows is not None and len(rows):
+                for path in _group_rows(rows).to_paths():
+                    yield path
+            if not lines:
+                return
+
+def line_distances(points, line_params):
+    """Distances from an (N, 2) block of points to the line ax + by + c = 0."""
     a, b, c = line_params
-    x, y = point
-    return abs(a*x + b*y + c) / np.sqrt(a**2 + b**2)
+    points = np.asarray(points, dtype=np.float64)
+    return np.abs(a*points[:, 0] + b*points[:, 1] + c) / np.sqrt(a**2 + b**2)
+
+def distance_point_line(point, line_params):
+    return line_distances(np.reshape(point, (1, 2)), line_params)[0]
 
 def fit_line(points):
     x = points[:, 0]
@@ -41,99 +112,490 @@ def fit_line(points):
     a, b, c = m, -1, c
     return a, b, c
 
-def is_straight_line(points, threshold=0.1):
+def match_line(points, threshold=0.1):
+    """Return the line parameters if the points fit a line within threshold, else None."""
     if len(points) < 2:
-        return False
+        return None
     line_params = fit_line(points)
-    distances = [distance_point_line(point, line_params) for point in points]
-    return np.max(distances) < threshold
+    return line_params if np.max(line_distances(points, line_params)) < threshold else None
 
-def distance_point_circle(point, circle_params):
+def is_straight_line(points, threshold=0.1):
+    return match_line(points, threshold) is not None
+
+def circle_distances(points, circle_params):
+    """Distances from an (N, 2) block of points to a circle (xc, yc, r)."""
     xc, yc, r = circle_params
-    x, y = point
-    return abs(np.sqrt((x - xc)**2 + (y - yc)**2) - r)
+    points = np.asarray(points, dtype=np.float64)
+    return np.abs(np.hypot(points[:, 0] - xc, points[:, 1] - yc) - r)
+
+def distance_point_circle(point, circle_params):
+    return circle_distances(np.reshape(point, (1, 2)), circle_params)[0]
+
+# Geometric refinement only runs when the algebraic max residual lies in
+# [threshold, CIRCLE_REFINE_BAND * threshold), where it could still flip the test.
+CIRCLE_REFINE_BAND = 3.0
+
+def _central_moments(points):
+    """Centroid and the central moments (Mxx, Myy, Mxy, Mxz, Myz, Mzz) with z = x^2 + y^2."""
+    centroid = points.mean(axis=0)
+    centered = points - centroid
+    block = np.column_stack([centered, np.einsum('ij,ij->i', centered, centered)])
+    (Mxx, Mxy, Mxz), (_, Myy, Myz), (_, _, Mzz) = (block.T @ block / len(points)).tolist()
+    return centroid, (Mxx, Myy, Mxy, Mxz, Myz, Mzz)
+
+def _taubin_polynomial(Mxx, Myy, Mxy, Mxz, Myz, Mzz):
+    # Coefficients A0..A3 of Taubin's characteristic polynomial (Chernov's formulation)
+    Mz = Mxx + Myy
+    cov_xy = Mxx*Myy - Mxy*Mxy
+    var_z = Mzz - Mz*Mz
+    A3 = 4*Mz
+    A2 = -3*Mz*Mz - Mzz
+    A1 = var_z*Mz + 4*cov_xy*Mz - Mxz*Mxz - Myz*Myz
+    A0 = Mxz*(Mxz*Myy - Myz*Mxy) + Myz*(Myz*Mxx - Mxz*Mxy) - var_z*cov_xy
+    return A0, A1, A2, A3
+
+def _taubin_center(root, Mxx, Myy, Mxy, Mxz, Myz, Mzz):
+    Mz = Mxx + Myy
+    det = root*root - root*Mz + Mxx*Myy - Mxy*Mxy
+    xc = (Mxz*(Myy - root) - Myz*Mxy) / det / 2
+    yc = (Myz*(Mxx - root) - Mxz*Mxy) / det / 2
+    return xc, yc, xc*xc + yc*yc + Mz
+
+def _taubin_circle(Mxx, Myy, Mxy, Mxz, Myz, Mzz):
+    """
+    Taubin circle from central moments, returning the center offset from the
+    centroid and the radius. The root of the characteristic polynomial is found
+    by Newton iterations from zero. Takes floats for a single curve or equally
+    shaped arrays with one entry per curve; both give the same result per curve.
+    """
+    moments = (Mxx, Myy, Mxy, Mxz, Myz, Mzz)
+    A0, A1, A2, A3 = _taubin_polynomial(*moments)
+
+    if np.ndim(Mxx) == 0:
+        x, y = 0.0, float(A0)
+        for _ in range(99):
+            dy = A1 + x*(2*A2 + 3*A3*x)
+            if dy == 0:
+                break
+            x_new = x - y/dy
+            y_new = A0 + x_new*(A1 + x_new*(A2 + x_new*A3))
+            if not math.isfinite(x_new) or x_new == x or abs(y_new) >= abs(y):
+                break
+            x, y = x_new, y_new
+        try:
+            xc, yc, r_squared = _taubin_center(x, *moments)
+        except ZeroDivisionError:
+            return math.nan, math.nan, math.nan
+        return xc, yc, math.sqrt(r_squared)
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        x = np.zeros(np.shape(A0))
+        y = np.asarray(A0, dtype=np.float64)
+        active = np.ones(x.shape, dtype=bool)
+        for _ in range(99):
+            dy = A1 + x*(2*A2 + 3*A3*x)
+            x_new = x - y/dy
+            y_new = A0 + x_new*(A1 + x_new*(A2 + x_new*A3))
+            active &= np.isfinite(x_new) & (x_new != x) & (np.abs(y_new) < np.abs(y))
+            if not np.any(active):
+                break
+            x = np.where(active, x_new, x)
+            y = np.where(active, y_new, y)
+        xc, yc, r_squared = _taubin_center(x, *moments)
+        return xc, yc, np.sqrt(r_squared)
+
+def fit_circle_algebraic(points):
+    """Closed-form Taubin circle fit, returning (xc, yc, r)."""
+    centroid, moments = _central_moments(np.asarray(points, dtype=np.float64))
+    xc, yc, r = _taubin_circle(*moments)
+    return np.array([xc + centroid[0], yc + centroid[1], r])
+
+def refine_circle(points, circle_params):
+    """Geometric least-squares refinement of a circle with an analytic Jacobian."""
+    points = np.asarray(points, dtype=np.float64)
 
-def fit_circle(points):
     def circle_error(params, points):
-        return [distance_point_circle(point, params) for point in points]
-    
-    x_mean, y_mean = np.mean(points, axis=0)
-    r_init = np.mean(np.sqrt(np.sum((points - [x_mean, y_mean])**2, axis=1)))
-    params_init = [x_mean, y_mean, r_init]
-    
-    params_optimized, _ = optimize.leastsq(circle_error, params_init, args=(points,))
+        return np.hypot(points[:, 0] - params[0], points[:, 1] - params[1]) - params[2]
+
+    def circle_jacobian(params, points):
+        dx, dy = points[:, 0] - params[0], points[:, 1] - params[1]
+        d = np.maximum(np.hypot(dx, dy), np.finfo(np.float64).tiny)
+        return np.column_stack([-dx / d, -dy / d, -np.ones(len(points))])
+
+    params_optimized, _ = optimize.leastsq(circle_error, circle_params, args=(points,), Dfun=circle_jacobian)
+    params_optimized[2] = abs(params_optimized[2])
     return params_optimized
 
-def is_circle(points, threshold=0.1):
+def fit_circle(points, refine=False, threshold=None, initial=None):
+    """
+    Fit a circle (xc, yc, r). The algebraic Taubin fit is the default. With
+    refine=True a geometric refinement follows when the algebraic max residual
+    is borderline for threshold (always, if no threshold is given). initial
+    warm-starts the refinement instead of the algebraic estimate.
+    """
+    circle_params = fit_circle_algebraic(points) if initial is None else np.array(initial, dtype=np.float64)
+    if not refine:
+        return circle_params
+    if threshold is not None and initial is None:
+        max_distance = np.max(circle_distances(points, circle_params))
+        if not threshold <= max_distance < CIRCLE_REFINE_BAND * threshold:
+            return circle_params
+    return refine_circle(points, circle_params)
+
+def match_circle(points, threshold=0.1, refine=False):
+    """Return the circle parameters if the points fit a circle within threshold, else None."""
     if len(points) < 3:
-        return False
-    circle_params = fit_circle(points)
-    distances = [distance_point_circle(point, circle_params) for point in points]
-    return np.max(distances) < threshold
+        return None
+    circle_params = fit_circle(points, refine=refine, threshold=threshold)
+    return circle_params if np.max(circle_distances(points, circle_params)) < threshold else None
 
-def distance_point_ellipse(point, ellipse_params):
-    x, y = point
+def is_circle(points, threshold=0.1, refine=False):
+    return match_circle(points, threshold, refine) is not None
+
+def ellipse_distances(points, ellipse_params):
+    """Algebraic residuals of an (N, 2) block of points against an ellipse (xc, yc, a, b, theta)."""
     xc, yc, a, b, theta = ellipse_params
+    points = np.asarray(points, dtype=np.float64)
+    dx, dy = points[:, 0] - xc, points[:, 1] - yc
     cos_theta, sin_theta = np.cos(theta), np.sin(theta)
-    x_rotated = (x - xc) * cos_theta + (y - yc) * sin_theta
-    y_rotated = -(x - xc) * sin_theta + (y - yc) * cos_theta
+    x_rotated = dx * cos_theta + dy * sin_theta
+    y_rotated = -dx * sin_theta + dy * cos_theta
     return np.abs(((x_rotated ** 2) / (a ** 2)) + ((y_rotated ** 2) / (b ** 2)) - 1)
 
+def distance_point_ellipse(point, ellipse_params):
+    return ellipse_distances(np.reshape(point, (1, 2)), ellipse_params)[0]
+
 def fit_ellipse(points):
+    """Direct algebraic ellipse fit, returning (xc, yc, a, b, theta)."""
     ellipse = cv2.fitEllipse(points.astype(np.float32))
     center, axes, angle = ellipse
     return (*center, axes[0]/2, axes[1]/2, np.radians(angle))
 
-def is_ellipse(points, threshold=0.1):
+def match_ellipse(points, threshold=0.1):
+    """Return the ellipse parameters if the points fit an ellipse within threshold, else None."""
     if len(points) < 5:  # Ellipse fitting requires at least 5 points
-        return False
+        return None
     try:
         ellipse_params = fit_ellipse(points)
-        distances = [distance_point_ellipse(point, ellipse_params) for point in points]
-        return np.max(distances) < threshold
+        return ellipse_params if np.max(ellipse_distances(points, ellipse_params)) < threshold else None
     except:
-        return False
+        return None
 
-def distance_point_rectangle(point, rectangle_params):
-    x, y = point
+def is_ellipse(points, threshold=0.1):
+    return match_ellipse(points, threshold) is not None
+
+def rectangle_distances(points, rectangle_params):
+    """Signed outside distances of an (N, 2) block of points to a rotated rectangle (cx, cy, w, h, angle)."""
     cx, cy, width, height, angle = rectangle_params
+    points = np.asarray(points, dtype=np.float64)
+    dx, dy = points[:, 0] - cx, points[:, 1] - cy
     cos_angle, sin_angle = np.cos(angle), np.sin(angle)
-    x_rotated = cos_angle * (x - cx) - sin_angle * (y - cy)
-    y_rotated = sin_angle * (x - cx) + cos_angle * (y - cy)
-    dx = np.abs(x_rotated) - width / 2
-    dy = np.abs(y_rotated) - height / 2
-    return max(dx, dy)
+    x_rotated = cos_angle * dx - sin_angle * dy
+    y_rotated = sin_angle * dx + cos_angle * dy
+    return np.maximum(np.abs(x_rotated) - width / 2, np.abs(y_rotated) - height / 2)
+
+def distance_point_rectangle(point, rectangle_params):
+    return rectangle_distances(np.reshape(point, (1, 2)), rectangle_params)[0]
 
 def fit_rectangle(points):
     rect = cv2.minAreaRect(points.astype(np.float32))
     center, (width, height), angle = rect
     return (*center, width, height, np.radians(angle))
 
-def is_rectangle(points, threshold=0.1):
+def match_rectangle(points, threshold=0.1):
+    """Return the rectangle parameters if the points fit a rectangle within threshold, else None."""
     if len(points) < 4:  # Rectangle fitting requires at least 4 points
-        return False
+        return None
     rectangle_params = fit_rectangle(points)
-    distances = [distance_point_rectangle(point, rectangle_params) for point in points]
-    return np.max(distances) < threshold
-
-def regularize_curve(points):
-    if is_straight_line(points):
-        return {"type": "line", "params": fit_line(points), "points": points}
-    elif is_circle(points):
-        return {"type": "circle", "params": fit_circle(points), "points": points}
-    elif is_ellipse(points):
-        return {"type": "ellipse", "params": fit_ellipse(points), "points": points}
-    elif is_rectangle(points):
-        return {"type": "rectangle", "params": fit_rectangle(points), "points": points}
+    return rectangle_params if np.max(rectangle_distances(points, rectangle_params)) < threshold else None
+
+def is_rectangle(points, threshold=0.1):
+    return match_rectangle(points, threshold) is not None
+
+def curve_statistics(points):
+    """
+    Statistics shared by all shape tests, computed in one pass over the points:
+    centroid, central moments and covariance eigenvalues. The indices of the
+    convex hull vertices are filled in lazily by the tests that need them.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    centroid, moments = _central_moments(points)
+    Mxx, Myy, Mxy = moments[:3]
+    half_trace, half_gap = (Mxx + Myy) / 2, np.hypot((Mxx - Myy) / 2, Mxy)
+    return {
+        "points": points,
+        "count": len(points),
+        "centroid": centroid,
+        "moments": moments,
+        "eigenvalues": (max(half_trace - half_gap, 0.0), half_trace + half_gap),
+        "hull": None,
+    }
+
+def _convex_hull(stats):
+    if stats["hull"] is None:
+        stats["hull"] = cv2.convexHull(stats["points"].astype(np.float32), returnPoints=False).ravel()
+    return stats["points"][stats["hull"]]
+
+def _circle_bound(moments, xc, yc, r):
+    """
+    Lower bound on the max residual of the Taubin circle from the moments
+    alone. d^2 - r^2 = (d - r)(d + r), so a max residual t gives
+    |d^2 - r^2| <= t(2r + t) at every point, and the RMS spread s of the
+    squared radii about r^2 then gives t >= sqrt(r^2 + s) - r.
+    """
+    Mxx, Myy, Mxy, Mxz, Myz, Mzz = moments
+    Mz = Mxx + Myy
+    spread = Mzz - Mz*Mz - 4*(xc*Mxz + yc*Myz) + 4*(xc*xc*Mxx + 2*xc*yc*Mxy + yc*yc*Myy)
+    spread = math.sqrt(max(spread, 0.0))
+    return spread / (math.sqrt(r*r + spread) + r)
+
+def _score_line(stats, threshold, refine):
+    # The RMS distance to the best total-least-squares line, sqrt(lambda_min), is a
+    # lower bound on the max residual of any line, so wide curves are rejected unfitted.
+    lower_bound = np.sqrt(stats["eigenvalues"][0])
+    if lower_bound >= threshold:
+        return None, lower_bound
+    Mxx, Myy, Mxy = stats["moments"][:3]
+    if Mxx > 0:
+        # Same least-squares line as fit_line, read off the shared moments
+        slope = Mxy / Mxx
+        line_params = (slope, -1, stats["centroid"][1] - slope*stats["centroid"][0])
     else:
-        return {"type": "unknown", "params": None, "points": points}
+        line_params = fit_line(stats["points"])
+    return line_params, np.max(line_distances(stats["points"], line_params))
+
+def _score_circle(stats, threshold, refine):
+    xc, yc, r = _taubin_circle(*stats["moments"])
+    # Refinement is only tried within CIRCLE_REFINE_BAND, so beyond it the bound rejects either way
+    lower_bound = _circle_bound(stats["moments"], xc, yc, r)
+    if lower_bound >= (CIRCLE_REFINE_BAND * threshold if refine else threshold):
+        return None, lower_bound
+    circle_params = np.array([xc + stats["centroid"][0], yc + stats["centroid"][1], r])
+    score = np.max(circle_distances(stats["points"], circle_params))
+    if refine and threshold <= score < CIRCLE_REFINE_BAND * threshold:
+        circle_params = refine_circle(stats["points"], circle_params)
+        score = np.max(circle_distances(stats["points"], circle_params))
+    return circle_params, score
+
+def _ellipse_bound(stats, ellipse_params):
+    """
+    Lower bound on the max algebraic residual of an ellipse: the magnitude of
+    the mean residual, E[(p - c)^T Q (p - c)] - 1 = tr(Q C) + (m - c)^T Q (m - c) - 1
+    for the point covariance C and centroid m, read off the moments.
+    """
+    xc, yc, a, b, theta = ellipse_params
+    Mxx, Myy, Mxy = stats["moments"][:3]
+    cos_theta, sin_theta = np.cos(theta), np.sin(theta)
+    dx, dy = stats["centroid"][0] - xc, stats["centroid"][1] - yc
+    # Covariance and centroid offset in the ellipse frame, as in ellipse_distances
+    var_u = cos_theta*cos_theta*Mxx + 2*cos_theta*sin_theta*Mxy + sin_theta*sin_theta*Myy
+    var_v = sin_theta*sin_theta*Mxx - 2*cos_theta*sin_theta*Mxy + cos_theta*cos_theta*Myy
+    du, dv = dx*cos_theta + dy*sin_theta, -dx*sin_theta + dy*cos_theta
+    return abs((var_u + du*du) / a**2 + (var_v + dv*dv) / b**2 - 1)
+
+def _score_ellipse(stats, threshold, refine):
+    try:
+        ellipse_params = fit_ellipse(stats["points"])
+    except:
+        return None, np.inf
+    # No cheap bound holds before the fit, since any short arc may lie on some ellipse
+    lower_bound = _ellipse_bound(stats, ellipse_params)
+    if not lower_bound < threshold:
+        return None, lower_bound
+    return ellipse_params, np.max(ellipse_distances(stats["points"], ellipse_params))
+
+def _score_rectangle(stats, threshold, refine):
+    # minAreaRect only depends on the hull. The outside distance is convex, so
+    # its max over the points is reached at a hull vertex and is exact there.
+    hull = _convex_hull(stats)
+    rectangle_params = fit_rectangle(hull)
+    return rectangle_params, np.max(rectangle_distances(hull, rectangle_params))
+
+# Candidates in priority order with the minimum point count each fit needs
+_CANDIDATES = (
+    ("line", 2, _score_line),
+    ("circle", 3, _score_circle),
+    ("ellipse", 5, _score_ellipse),
+    ("rectangle", 4, _score_rectangle),
+)
+# Types classify_curve can assign besides 'unknown', in priority order
+CANDIDATE_TYPES = tuple(curve_type for curve_type, _, _ in _CANDIDATES)
+
+def classify_curve(points, threshold=0.1, refine=False):
+    """
+    Classify a curve in a single pass over shared statistics. Candidates are tried
+    in the order line, circle, ellipse, rectangle and the first within threshold
+    wins. Returns the regularized curve and a dict of per-candidate scores: the
+    max residual of each fitted candidate, or the lower bound that rejected it
+    before the residuals were computed: the eigenvalue bound for lines, the
+    radial spread bound for circles and the mean residual for ellipses.
+    Candidates after the winner, or without enough points, are absent.
+    """
+    scores = {}
+    if len(points) >= 2:
+        stats = curve_statistics(points)
+        for curve_type, min_points, score_candidate in _CANDIDATES:
+            if stats["count"] < min_points:
+                continue
+            params, score = score_candidate(stats, threshold, refine)
+            scores[curve_type] = score
+            if params is not None and score < threshold:
+                return Curve(curve_type, params, points), scores
+    return Curve("unknown", None, points), scores
+
+def regularize_curve(points, refine=False, threshold=0.1):
+    return classify_curve(points, threshold=threshold, refine=refine)[0]
 
-def process_paths(paths):
+def process_paths(paths, refine=False, profiler=None, threshold=0.1):
+    # Per-curve fit timings are only taken when the profiler asks for them
+    profiler = profiler or NULL_PROFILER
     regularized_paths = []
-    for path in paths:
+    for i, path in enumerate(paths):
         regularized_path = []
-        for curve in path:
-            regularized_curve = regularize_curve(curve)
+        for j, curve in enumerate(path):
+            if profiler.per_curve:
+                start = time.perf_counter()
+                regularized_curve = regularize_curve(curve, refine=refine, threshold=threshold)
+                profiler.record_curve(i, j, regularized_curve["type"], time.perf_counter() - start)
+            else:
+                regularized_curve = regularize_curve(curve, refine=refine, threshold=threshold)
             regularized_path.append(regularized_curve)
         regularized_paths.append(regularized_path)
     return regularized_paths
+
+def _segment_layout(counts):
+    """Start offsets of each segment and the segment id of every point."""
+    starts = np.zeros(len(counts), dtype=np.int64)
+    np.cumsum(counts[:-1], out=starts[1:])
+    return starts, np.repeat(np.arange(len(counts)), counts)
+
+def _gather_curves(coords, curve_offsets, curve_ids):
+    """Points of the selected curves packed contiguously, with their counts."""
+    counts = np.diff(curve_offsets)[curve_ids]
+    point_ids = np.repeat(curve_offsets[curve_ids] - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+    return coords[point_ids], counts
+
+def _segment_max(values, counts):
+    starts, _ = _segment_layout(counts)
+    return np.maximum.reduceat(values, starts) if len(values) else np.empty(0)
+
+def _batched_max_distances(distance_function, points, counts, params):
+    """Max residual per curve, with one parameter row per curve repeated over its points."""
+    repeated = np.repeat(params, counts, axis=0)
+    return _segment_max(distance_function(points, repeated.T), counts)
+
+def process_paths_batched(paths, threshold=0.1, refine=False):
+    """
+    Regularize every curve of an image at once on a flat coordinate array.
+    Moments, line fits, Taubin circle fits and all residual maxima are computed
+    with segment-wise reductions; ellipse and rectangle fits run per curve only
+    for curves that are still unclassified. Accepts a PolylineStore or nested
+    paths and returns a CurveTable with the store, one type code per curve
+    and a (num_curves, 5) parameter array padded with NaN. Classifications
+    match process_paths.
+    """
+    store = paths if isinstance(paths, PolylineStore) else PolylineStore.from_paths(paths)
+    coords = np.asarray(store.coords, dtype=np.float64)
+    counts = np.diff(store.curve_offsets)
+    num_curves = len(counts)
+    type_codes = np.zeros(num_curves, dtype=np.uint8)
+    params = np.full((num_curves, PARAM_WIDTH), np.nan)
+
+    # Shared central moments for every curve with at least two points
+    candidates = np.flatnonzero(counts >= 2)
+    points, cand_counts = _gather_curves(coords, store.curve_offsets, candidates)
+    if len(candidates):
+        starts, point_curve = _segment_layout(cand_counts)
+        centroids = np.add.reduceat(points, starts) / cand_counts[:, None]
+        x, y = (points - centroids[point_curve]).T
+        z = x*x + y*y
+        sums = np.add.reduceat(np.column_stack([x*x, y*y, x*y, x*z, y*z, z*z]), starts)
+        Mxx, Myy, Mxy, Mxz, Myz, Mzz = (sums / cand_counts[:, None]).T
+
+        # Lines: exact lower-bound rejection, then the moment least-squares fit
+        half_trace, half_gap = (Mxx + Myy) / 2, np.hypot((Mxx - Myy) / 2, Mxy)
+        possible = np.sqrt(np.maximum(half_trace - half_gap, 0.0)) < threshold
+        with np.errstate(divide='ignore', invalid='ignore'):
+            slope = Mxy / Mxx
+        line_params = np.column_stack([slope, -np.ones(len(slope)), centroids[:, 1] - slope*centroids[:, 0]])
+        for i in np.flatnonzero(possible & ~(Mxx > 0)):
+            line_params[i] = fit_line(points[starts[i]:starts[i] + cand_counts[i]])
+        with np.errstate(invalid='ignore'):
+            line_scores = _batched_max_distances(line_distances, points, cand_counts, line_params)
+        is_line = possible & (line_scores < threshold)
+        type_codes[candidates[is_line]] = CURVE_TYPE_CODES["line"]
+        params[candidates[is_line], :3] = line_params[is_line]
+
+        # Circles: one vectorized Taubin solve for all remaining curves
+        xc, yc, r = _taubin_circle(Mxx, Myy, Mxy, Mxz, Myz, Mzz)
+        circle_params = np.column_stack([xc + centroids[:, 0], yc + centroids[:, 1], r])
+        with np.errstate(invalid='ignore'):
+            circle_scores = _batched_max_distances(circle_distances, points, cand_counts, circle_params)
+        if refine:
+            for i in np.flatnonzero(~is_line & (cand_counts >= 3) &
+                                    (threshold <= circle_scores) & (circle_scores < CIRCLE_REFINE_BAND * threshold)):
+                curve_points = points[starts[i]:starts[i] + cand_counts[i]]
+                circle_params[i] = refine_circle(curve_points, circle_params[i])
+                circle_scores[i] = np.max(circle_distances(curve_points, circle_params[i]))
+        is_circle_ = ~is_line & (cand_counts >= 3) & (circle_scores < threshold)
+        type_codes[candidates[is_circle_]] = CURVE_TYPE_CODES["circle"]
+        params[candidates[is_circle_], :3] = circle_params[is_circle_]
+
+    # Ellipses and rectangles: per-curve cv2 fits, batched residuals
+    for curve_type, min_points, fit, distance_function in (
+            ("ellipse", 5, fit_ellipse, ellipse_distances),
+            ("rectangle", 4, fit_rectangle, rectangle_distances)):
+        remaining = np.flatnonzero((type_codes == 0) & (counts >= min_points))
+        if len(remaining) == 0:
+            continue
+        points, rem_counts = _gather_curves(coords, store.curve_offsets, remaining)
+        starts, _ = _segment_layout(rem_counts)
+        fitted = np.full((len(remaining), PARAM_WIDTH), np.nan)
+        for i in range(len(remaining)):
+            try:
+                fitted[i] = fit(points[starts[i]:starts[i] + rem_counts[i]])
+            except Exception:
+                pass
+        with np.errstate(invalid='ignore', divide='ignore'):
+            scores = _batched_max_distances(distance_function, points, rem_counts, fitted)
+        matched = scores < threshold
+        type_codes[remaining[matched]] = CURVE_TYPE_CODES[curve_type]
+        params[remaining[matched]] = fitted[matched]
+
+    return CurveTable(store, type_codes, params)
+
+def batch_to_paths(batch):
+    """Expand a process_paths_batched result into the nested curves returned by process_paths."""
+    return batch.to_paths()
+
+def _regularize_range(store, first, last, threshold=0.1, refine=False):
+    """Type codes and parameters of curves first..last-1 of a store, fitted on views of its arrays."""
+    offsets = np.asarray(store.curve_offsets[first:last + 1])
+    part = PolylineStore(store.coords[offsets[0]:offsets[-1]], offsets - offsets[0],
+                         np.array([0, last - first], dtype=np.int64))
+    table = process_paths_batched(part, threshold=threshold, refine=refine)
+    return table.type_codes, table.params
+
+def process_paths_parallel(store, workers=None, threshold=0.1, refine=False, min_curves_per_task=256):
+    """
+    process_paths_batched split over a process pool. The store is placed in
+    shared memory once; each task receives handles plus a range of curves
+    and fits that range in place, returning only type codes and parameters.
+    Returns a CurveTable over the original store with the same result as
+    process_paths_batched.
+    """
+    store = store if isinstance(store, PolylineStore) else PolylineStore.from_paths(store)
+    workers = workers or os.cpu_count() or 1
+    num_curves = store.num_curves
+    tasks = min(workers, max(num_curves // min_curves_per_task, 1))
+    if tasks <= 1:
+        return process_paths_batched(store, threshold=threshold, refine=refine)
+    bounds = np.linspace(0, num_curves, tasks + 1).astype(np.int64).tolist()
+    with SharedArena() as arena, ProcessPoolExecutor(max_workers=tasks) as executor:
+        handle = arena.share_store(store)
+        futures = [executor.submit(call_with_shared, _regularize_range, handle, first, last, threshold, refine)
+                   for first, last in zip(bounds[:-1], bounds[1:])]
+        results = [future.result() for future in futures]
+    type_codes = np.concatenate([codes for codes, _ in results])
+    params = np.concatenate([fitted for _, fitted in results])
+    return CurveTable(store, type_codes, params)
@@ -0,0 +1,169 @@
+# File: curve_sampling.py
+
+from functools import lru_cache
+import numpy as np
+import cv2
+from scipy import interpolate
+from polyline_store import PolylineStore
+
+DEFAULT_TOLERANCE = 0.25
+MIN_SEGMENTS = 8
+MAX_SEGMENTS = 1 << 14
+# Segment counts are rounded up to a multiple of this, so nearby sizes share a trig table
+SEGMENT_QUANTUM = 4
+
+def circle_segments(radius, tolerance=DEFAULT_TOLERANCE, sweep=2*np.pi, min_segments=MIN_SEGMENTS):
+    """
+    Number of chords needed to follow an arc of the given radius and sweep
+    with a chordal error (sagitta) of at most tolerance.
+    """
+    radius = abs(float(radius))
+    if radius <= tolerance or not np.isfinite(radius):
+        return min_segments
+    step = 2 * np.arccos(1 - tolerance / radius)
+    segments = int(np.ceil(abs(sweep) / step))
+    segments = -(-segments // SEGMENT_QUANTUM) * SEGMENT_QUANTUM
+    return int(np.clip(segments, min_segments, MAX_SEGMENTS))
+
+@lru_cache(maxsize=256)
+def unit_circle(segments):
+    """Read-only (segments + 1, 2) table of cos and sin around the full circle, closed at both ends."""
+    angles = np.linspace(0, 2*np.pi, segments + 1)
+    table = np.column_stack([np.cos(angles), np.sin(angles)])
+    table[-1] = table[0]
+    table.flags.writeable = False
+    return table
+
+def sample_line(params, points):
+    """
+    The fitted line ax + by + c = 0 across the x range of points, or the y
+    range for steep lines, which is exact with two points.
+    """
+    a, b, c = params
+    if abs(b) >= abs(a):
+        x = np.array([points[:, 0].min(), points[:, 0].max()], dtype=np.float64)
+        return np.column_stack([x, (-a*x - c) / b])
+    y = np.array([points[:, 1].min(), points[:, 1].max()], dtype=np.float64)
+    return np.column_stack([(-b*y - c) / a, y])
+
+def sample_circle(params, tolerance=DEFAULT_TOLERANCE):
+    xc, yc, radius = params
+    return unit_circle(circle_segments(radius, tolerance)) * radius + (xc, yc)
+
+def sample_ellipse(params, tolerance=DEFAULT_TOLERANCE):
+    """
+    Ellipse sampled uniformly in its parameter. The chordal error of a
+    parameter step is bounded by that of the circle on the major axis.
+    """
+    xc, yc, a, b, angle = params
+    unit = unit_circle(circle_segments(max(abs(a), abs(b)), tolerance))
+    rotation = np.array([[np.cos(angle), np.sin(angle)], [-np.sin(angle), np.cos(angle)]])
+    return (unit * (a, b)) @ rotation + (xc, yc)
+
+def sample_arc(center, radius, start_angle, sweep, tolerance=DEFAULT_TOLERANCE):
+    """Arc from start_angle turning by sweep (negative for clockwise)."""
+    segments = circle_segments(radius, tolerance, sweep, min_segments=1)
+    angles = start_angle + np.linspace(0, sweep, segments + 1)
+    return np.column_stack([center[0] + radius * np.cos(angles), center[1] + radius * np.sin(angles)])
+
+def _swept_angles(angles):
+    """Start angle and signed sweep of consecutive point angles around a centre."""
+    unwrapped = np.unwrap(angles)
+    return unwrapped[0], unwrapped[-1] - unwrapped[0]
+
+def sample_arc_through(params, points, tolerance=DEFAULT_TOLERANCE):
+    """The arc of the circle (xc, yc, r) swept by points, from the first point to the last."""
+    xc, yc, radius = params
+    start, sweep = _swept_angles(np.arctan2(points[:, 1] - yc, points[:, 0] - xc))
+    return sample_arc((xc, yc), radius, start, sweep, tolerance)
+
+def sample_elliptic_arc(params, points, tolerance=DEFAULT_TOLERANCE):
+    """The part of the ellipse (xc, yc, a, b, theta) swept by points, sampled uniformly in its parameter."""
+    xc, yc, a, b, angle = params
+    dx, dy = points[:, 0] - xc, points[:, 1] - yc
+    u = (dx*np.cos(angle) + dy*np.sin(angle)) / a
+    v = (-dx*np.sin(angle) + dy*np.cos(angle)) / b
+    start, sweep = _swept_angles(np.arctan2(v, u))
+    t = start + np.linspace(0, sweep, circle_segments(max(abs(a), abs(b)), tolerance, sweep, min_segments=1) + 1)
+    rotation = np.array([[np.cos(angle), np.sin(angle)], [-np.sin(angle), np.cos(angle)]])
+    return np.column_stack([a*np.cos(t), b*np.sin(t)]) @ rotation + (xc, yc)
+
+def sample_rectangle(params):
+    corners = cv2.boxPoints((tuple(params[0:2]), tuple(params[2:4]), np.degrees(params[4])))
+    return np.vstack([corners, corners[:1]]).astype(np.float64)
+
+def sample_spline(tck, tolerance=DEFAULT_TOLERANCE, probe_points=256):
+    """
+    Sample a parametric spline from splprep so that each chord stays within
+    tolerance. A chord across a stretch of curvature k and length s deviates
+    by about k s^2 / 8, so samples are spread with density sqrt(k / 8 tol)
+    per unit length, estimated on a probe of the spline's derivatives.
+    """
+    u = np.linspace(0, 1, probe_points)
+    dx, dy = interpolate.splev(u, tck, der=1)
+    speed = np.hypot(dx, dy)
+    if tck[2] > 1:
+        ddx, ddy = interpolate.splev(u, tck, der=2)
+        curvature = np.abs(dx * ddy - dy * ddx) / np.maximum(speed, 1e-12) ** 3
+    else:
+        curvature = np.zeros_like(speed)
+    density = np.sqrt(curvature / (8 * tolerance)) * speed
+    cumulative = np.concatenate([[0], np.cumsum((density[1:] + density[:-1]) / 2 * np.diff(u))])
+    segments = int(np.clip(np.ceil(cumulative[-1]), 1, MAX_SEGMENTS))
+    if cumulative[-1] > 0:
+        samples = np.interp(np.linspace(0, cumulative[-1], segments + 1), cumulative, u)
+    else:
+        samples = np.linspace(0, 1, segments + 1)
+    return np.column_stack(interpolate.splev(samples, tck))
+
+def sample_curve(curve, tolerance=DEFAULT_TOLERANCE):
+    """Points of a regularized or completed curve within tolerance, or None if there is nothing to draw."""
+    params = curve.get('params')
+    if curve['type'] == 'line':
+        return sample_line(params, curve['points'])
+    if curve['type'] == 'circle':
+        return sample_circle(params, tolerance)
+    if curve['type'] == 'ellipse':
+        return sample_ellipse(params, tolerance)
+    if curve['type'] == 'rectangle':
+        return sample_rectangle(params)
+    if curve['type'] == 'arc':
+        return sample_arc_through(params, curve['points'], tolerance)
+    if curve['type'] == 'elliptic_arc':
+        return sample_elliptic_arc(params, curve['points'], tolerance)
+    if curve['type'] in ('completed', 'bridge'):
+        return curve.get('completed_points')
+    if curve['type'] == 'unknown':
+        return curve.get('points')
+    return None
+
+def sample_curves(curves, tolerance=DEFAULT_TOLERANCE):
+    """
+    Sample many curves at once into a PolylineStore with one single-curve
+    path per input curve, empty where there is nothing to draw. Circles and
+    ellipses that need the same number of segments are generated together
+    from one shared trig table.
+    """
+    samples = [None] * len(curves)
+    batches = {}
+    for i, curve in enumerate(curves):
+        if curve['type'] == 'circle':
+            xc, yc, radius = curve['params']
+            params = (xc, yc, radius, radius, 0.0)
+        elif curve['type'] == 'ellipse':
+            params = tuple(curve['params'])
+        else:
+            samples[i] = sample_curve(curve, tolerance)
+            continue
+        segments = circle_segments(max(abs(params[2]), abs(params[3])), tolerance)
+        batches.setdefault(segments, []).append((i, params))
+    for segments, entries in batches.items():
+        indices = [i for i, _ in entries]
+        xc, yc, a, b, angle = np.array([params for _, params in entries], dtype=np.float64).T[:, :, None]
+        unit = unit_circle(segments)
+        x, y = a * unit[:, 0], b * unit[:, 1]
+        cos, sin = np.cos(angle), np.sin(angle)
+        points = np.stack([xc + x*cos - y*sin, yc + x*sin + y*cos], axis=-1)
+        for i, outline in zip(indices, points):
+            samples[i] = outline
+    return PolylineStore.from_polylines([np.empty((0, 2)) if outline is None else outline for outline in samples])
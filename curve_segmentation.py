@@ -0,0 +1,196 @@
+# File: curve_segmentation.py
+
+import numpy as np
+from curve_regularization import fit_circle, fit_ellipse
+from curve_model import Curve
+
+MIN_ARC_POINTS = 5
+MIN_ELLIPSE_POINTS = 6
+
+def _prefix_moments(points):
+    """
+    Running sums of 1, x, y, xx, xy, yy, xz, yz, z and zz with z = xx + yy,
+    one row per prefix, so the moments of points[i:j + 1] are rows j + 1 minus i.
+    """
+    x, y = points.T
+    z = x*x + y*y
+    moments = np.column_stack([np.ones(len(points)), x, y, x*x, x*y, y*y, x*z, y*z, z, z*z])
+    sums = np.zeros((len(points) + 1, moments.shape[1]))
+    np.cumsum(moments, axis=0, out=sums[1:])
+    return sums
+
+def range_errors(sums, points, end, min_arc_points=MIN_ARC_POINTS):
+    """
+    Squared fit errors of every range points[i:end + 1] with i < end, each in
+    O(1) from the prefix moments. The line error is the total least-squares
+    residual, the smallest covariance eigenvalue times the count. The arc error
+    is the Kasa algebraic residual divided by (2r)^2, which approximates the
+    sum of squared distances to the circle. Also returns the larger distance
+    of the range's two end points to each fit, since a fit that absorbs a
+    corner is furthest off at its ends. Ranges too short or too straight for
+    a circle get an infinite arc error.
+    """
+    S = sums[end + 1] - sums[:end]
+    m, Sx, Sy, Sxx, Sxy, Syy, Sxz, Syz, Sz, Szz = S.T
+    first, last = points[:end], points[end]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mx, my = Sx / m, Sy / m
+        cxx, cyy, cxy = Sxx / m - mx*mx, Syy / m - my*my, Sxy / m - mx*my
+        smallest = (cxx + cyy) / 2 - np.hypot((cxx - cyy) / 2, cxy)
+        # Unit normal of the total least-squares line, from whichever eigenvector row is better conditioned
+        use_x = np.abs(cxx - smallest) >= np.abs(cyy - smallest)
+        nx = np.where(use_x, cxy, smallest - cyy)
+        ny = np.where(use_x, smallest - cxx, cxy)
+        norm = np.hypot(nx, ny)
+        nx, ny = np.where(norm > 0, nx / norm, 1.0), np.where(norm > 0, ny / norm, 0.0)
+    line_errors = m * np.maximum(smallest, 0.0)
+    line_ends = np.maximum(np.abs(nx*(first[:, 0] - mx) + ny*(first[:, 1] - my)),
+                           np.abs(nx*(last[0] - mx) + ny*(last[1] - my)))
+
+    # Kasa fit: solve [[Sxx, Sxy, Sx], [Sxy, Syy, Sy], [Sx, Sy, m]] (D, E, F) = -(Sxz, Syz, Sz) by cofactors
+    c11, c12, c13 = Syy*m - Sy*Sy, Sx*Sy - Sxy*m, Sxy*Sy - Sx*Syy
+    c22, c23, c33 = Sxx*m - Sx*Sx, Sxy*Sx - Sxx*Sy, Sxx*Syy - Sxy*Sxy
+    det = Sxx*c11 + Sxy*c12 + Sx*c13
+    arc_errors = np.full(len(S), np.inf)
+    arc_ends = np.full(len(S), np.inf)
+    solvable = (m >= min_arc_points) & (np.abs(det) > 1e-12 * np.abs(Sxx * Syy * m))
+    if np.any(solvable):
+        c11, c12, c13, c22, c23, c33, det = (v[solvable] for v in (c11, c12, c13, c22, c23, c33, det))
+        vx, vy, vz = Sxz[solvable], Syz[solvable], Sz[solvable]
+        D = -(c11*vx + c12*vy + c13*vz) / det
+        E = -(c12*vx + c22*vy + c23*vz) / det
+        F = -(c13*vx + c23*vy + c33*vz) / det
+        residual = Szz[solvable] + D*vx + E*vy + F*vz
+        radius_squared = (D*D + E*E) / 4 - F
+        with np.errstate(invalid='ignore', divide='ignore'):
+            errors = np.maximum(residual, 0.0) / (4 * radius_squared)
+            radius = np.sqrt(radius_squared)
+            ends = np.maximum(np.abs(np.hypot(first[solvable, 0] + D/2, first[solvable, 1] + E/2) - radius),
+                              np.abs(np.hypot(last[0] + D/2, last[1] + E/2) - radius))
+        valid = radius_squared > 0
+        arc_errors[solvable] = np.where(valid, errors, np.inf)
+        arc_ends[solvable] = np.where(valid, ends, np.inf)
+    return line_errors, line_ends, arc_errors, arc_ends
+
+def optimal_breakpoints(points, tolerance=1.0, min_arc_points=MIN_ARC_POINTS):
+    """
+    Split a polyline into the fewest line and arc runs whose RMS distance to
+    their fit is within tolerance, breaking ties by total squared error.
+    Consecutive runs share their breakpoint. Dynamic programming over the
+    prefix moments costs O(N^2) in total, with O(1) work per candidate range.
+    Returns a list of (kind, start, end) with kind 'line' or 'arc' and
+    inclusive point indices.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    n = len(points)
+    if n < 2:
+        return []
+    # Centre and scale so the fourth-order sums keep their precision
+    scale = max(np.ptp(points, axis=0).max(), 1.0)
+    normalized = (points - points.mean(axis=0)) / scale
+    sums = _prefix_moments(normalized)
+    limit = (tolerance / scale) ** 2
+    # The error term of a whole segmentation stays below 0.5, so it only breaks ties in the count
+    error_weight = 1.0 / (4 * n * limit)
+
+    cost = np.zeros(n)
+    previous = np.zeros(n, dtype=np.int64)
+    kinds = [None] * n
+    for end in range(1, n):
+        line_errors, line_ends, arc_errors, arc_ends = range_errors(sums, normalized, end, min_arc_points)
+        counts = end + 1 - np.arange(end)
+        line_ok = (line_errors <= counts * limit) & (line_ends <= tolerance / scale)
+        arc_ok = ~line_ok & (arc_errors <= counts * limit) & (arc_ends <= tolerance / scale)
+        errors = np.where(line_ok, line_errors, np.where(arc_ok, arc_errors, np.inf))
+        totals = cost[:end] + 1 + error_weight * errors
+        start = int(np.argmin(totals))
+        cost[end], previous[end] = totals[start], start
+        kinds[end] = 'line' if line_ok[start] else 'arc'
+
+    runs, end = [], n - 1
+    while end > 0:
+        runs.append((kinds[end], int(previous[end]), end))
+        end = previous[end]
+    return runs[::-1]
+
+def _fit_segment_line(points):
+    """Total least-squares line (a, b, c) with a unit normal, which also holds for vertical runs."""
+    centroid = points.mean(axis=0)
+    centered = points - centroid
+    _, eigenvectors = np.linalg.eigh(centered.T @ centered)
+    a, b = eigenvectors[:, 0]
+    return a, b, -(a*centroid[0] + b*centroid[1])
+
+def _ellipse_rms(points, ellipse_params):
+    """RMS Sampson distance of points to an ellipse (xc, yc, a, b, theta), in pixels."""
+    xc, yc, a, b, theta = ellipse_params
+    dx, dy = points[:, 0] - xc, points[:, 1] - yc
+    u = dx*np.cos(theta) + dy*np.sin(theta)
+    v = -dx*np.sin(theta) + dy*np.cos(theta)
+    residual = u*u / (a*a) + v*v / (b*b) - 1
+    gradient = 2 * np.hypot(u / (a*a), v / (b*b))
+    return np.sqrt(np.mean((residual / np.maximum(gradient, 1e-12)) ** 2))
+
+def _match_elliptic_arc(points, tolerance):
+    if len(points) < MIN_ELLIPSE_POINTS:
+        return None
+    try:
+        ellipse_params = fit_ellipse(points)
+    except Exception:
+        return None
+    if not np.all(np.isfinite(ellipse_params)) or min(ellipse_params[2:4]) <= 0:
+        return None
+    return ellipse_params if _ellipse_rms(points, ellipse_params) <= tolerance else None
+
+def segment_polyline(points, tolerance=1.0, min_arc_points=MIN_ARC_POINTS, closed_tolerance=2.0):
+    """
+    Segment a polyline into a sequence of 'line', 'arc' and 'elliptic_arc'
+    Curve records. Each segment's points are its slice of the polyline.
+    Runs of consecutive arcs are merged greedily into one elliptic arc
+    while a single ellipse fits them within tolerance. A closed polyline
+    that is covered by one arc or elliptic arc becomes a 'circle' or 'ellipse'.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    runs = optimal_breakpoints(points, tolerance, min_arc_points)
+
+    segments, k = [], 0
+    while k < len(runs):
+        kind, start, end = runs[k]
+        if kind == 'arc':
+            merged = None
+            while k + 1 < len(runs) and runs[k + 1][0] == 'arc':
+                ellipse_params = _match_elliptic_arc(points[start:runs[k + 1][2] + 1], tolerance)
+                if ellipse_params is None:
+                    break
+                k += 1
+                end, merged = runs[k][2], ellipse_params
+            if merged is not None:
+                segments.append(('elliptic_arc', merged, start, end))
+            else:
+                segments.append(('arc', tuple(fit_circle(points[start:end + 1])), start, end))
+        else:
+            segments.append(('line', _fit_segment_line(points[start:end + 1]), start, end))
+        k += 1
+
+    closed = len(points) > 2 and np.hypot(*(points[-1] - points[0])) <= closed_tolerance
+    if closed and len(segments) == 1 and segments[0][0] in ('arc', 'elliptic_arc'):
+        kind, params, start, end = segments[0]
+        segments = [('circle' if kind == 'arc' else 'ellipse', params, start, end)]
+    return [Curve(kind, params, points[start:end + 1]) for kind, params, start, end in segments]
+
+def process_segmentation(regularized_paths, tolerance=1.0, min_arc_points=MIN_ARC_POINTS):
+    """
+    Replace every 'unknown' curve from process_paths with its sequence of
+    line, arc and elliptic arc segments, in place within its path. Curves
+    that were already regularized are kept as they are.
+    """
+    segmented_paths = []
+    for path in regularized_paths:
+        segmented_path = []
+        for curve in path:
+            if curve['type'] == 'unknown' and curve['points'] is not None and len(curve['points']) >= 2:
+                segmented_path.extend(segment_polyline(curve['points'], tolerance, min_arc_points))
+            else:
+                segmented_path.append(curve)
+        segmented_paths.append(segmented_path)
+    return segmented_paths
@@ -0,0 +1,226 @@
+# File: global_symmetry.py
+
+import numpy as np
+from scipy.spatial import cKDTree
+from curve_sampling import sample_curve
+
+DESCRIPTOR_SAMPLES = 64
+# Degree of each Hu invariant in the second-order moments, counting third-order
+# moments as degree 3/2. Dividing by h1 to that power removes the overall spread,
+# and dividing the log by it keeps noise in the high-order invariants from growing
+HU_DEGREES = np.array([1, 2, 3, 3, 6, 4, 6])
+# Relative invariants below this are noise, and all map to the same value
+HU_FLOOR = 1e-3
+
+def resample_by_length(points, num_samples=DESCRIPTOR_SAMPLES):
+    """Points spaced evenly along a polyline, and its arc length."""
+    points = np.asarray(points, dtype=np.float64)
+    arc_length = np.concatenate([[0], np.cumsum(np.hypot(*np.diff(points, axis=0).T))])
+    if arc_length[-1] <= 0:
+        return None, 0.0
+    samples = np.linspace(0, arc_length[-1], num_samples)
+    return np.column_stack([np.interp(samples, arc_length, points[:, 0]),
+                            np.interp(samples, arc_length, points[:, 1])]), arc_length[-1]
+
+def hu_invariants(samples, length):
+    """
+    Hu's seven moment invariants of a curve sampled evenly along its length,
+    with moments normalized by the arc length so they do not depend on scale.
+    The seventh changes sign under reflection, so its magnitude is used,
+    which makes all seven invariant to rotation and reflection.
+    """
+    centered = (samples - samples.mean(axis=0)) / length
+    x, y = centered.T
+
+    def eta(p, q):
+        return np.mean(x**p * y**q)
+
+    n20, n02, n11 = eta(2, 0), eta(0, 2), eta(1, 1)
+    n30, n03, n21, n12 = eta(3, 0), eta(0, 3), eta(2, 1), eta(1, 2)
+    a, b = n30 + n12, n21 + n03
+    return np.array([
+        n20 + n02,
+        (n20 - n02)**2 + 4*n11**2,
+        (n30 - 3*n12)**2 + (3*n21 - n03)**2,
+        a**2 + b**2,
+        (n30 - 3*n12)*a*(a**2 - 3*b**2) + (3*n21 - n03)*b*(3*a**2 - b**2),
+        (n20 - n02)*(a**2 - b**2) + 4*n11*a*b,
+        abs((3*n21 - n03)*a*(a**2 - 3*b**2) - (n30 - 3*n12)*b*(3*a**2 - b**2)),
+    ])
+
+def shape_descriptor(samples, length):
+    """
+    Rotation- and reflection-invariant descriptor of a curve: its log arc
+    length, log h1, and the log magnitudes of the other Hu invariants relative
+    to powers of h1, floored at HU_FLOOR. The signs of near-zero invariants
+    follow the noise, so they are dropped, and the floor keeps them from
+    spreading over many decades. The length is kept so that only copies of
+    the same size collide.
+    """
+    hu = np.abs(hu_invariants(samples, length))
+    scale = max(hu[0], 1e-12)
+    relative = np.log10(hu[1:] / scale**HU_DEGREES[1:] + HU_FLOOR) / HU_DEGREES[1:]
+    return np.concatenate([[np.log(length), np.log10(scale)], relative])
+
+def _principal_angle(samples):
+    centered = samples - samples.mean(axis=0)
+    (cxx, cxy), (_, cyy) = centered.T @ centered / len(samples)
+    return 0.5 * np.arctan2(2*cxy, cxx - cyy), np.hypot(cxx - cyy, 2*cxy) / max(cxx + cyy, 1e-12)
+
+def _rotation(angle):
+    return np.array([[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]])
+
+def _reflection(axis_angle):
+    return np.array([[np.cos(2*axis_angle), np.sin(2*axis_angle)], [np.sin(2*axis_angle), -np.cos(2*axis_angle)]])
+
+def _refine_angle(error, angle, step, resolution):
+    """Halve the step around angle down to resolution, moving to a neighbour whenever it lowers error."""
+    best = error(angle)
+    while step > resolution:
+        step /= 2
+        for candidate in (angle - step, angle + step):
+            value = error(candidate)
+            if value < best:
+                best, angle = value, candidate
+    return angle
+
+def match_transform(source, target, tolerance=2.0, isotropy=0.05, angular_steps=12,
+                    angular_resolution=np.radians(0.5)):
+    """
+    Find a rotation or reflection, plus translation, that maps the source
+    samples onto the target samples. The centroids fix the translation, and
+    the principal axes fix the candidate angles. Nearly isotropic shapes,
+    whose axes are undefined, are searched coarse to fine instead: the best
+    angle on a grid of angular_steps is refined down to angular_resolution,
+    once for rotations and once for reflections. A candidate is accepted when
+    the mean nearest-neighbour distance in both directions is within
+    tolerance. Returns (kind, matrix, offset, error) for the best candidate,
+    or None.
+    """
+    source_center, target_center = source.mean(axis=0), target.mean(axis=0)
+    source_centered, target_centered = source - source_center, target - target_center
+    target_tree = cKDTree(target_centered)
+    source_angle, source_anisotropy = _principal_angle(source)
+    target_angle, target_anisotropy = _principal_angle(target)
+    if min(source_anisotropy, target_anisotropy) < isotropy:
+        step = 2*np.pi / angular_steps
+        candidates = []
+        for kind, transform in (('rotation', _rotation), ('reflection', lambda angle: _reflection(angle / 2))):
+            def error(angle):
+                return target_tree.query(source_centered @ transform(angle).T)[0].mean()
+            coarse = min(np.arange(angular_steps) * step, key=error)
+            candidates.append((kind, transform(_refine_angle(error, coarse, step, angular_resolution))))
+    else:
+        turn = target_angle - source_angle
+        mirror = (target_angle + source_angle) / 2
+        candidates = [('rotation', _rotation(turn)), ('rotation', _rotation(turn + np.pi)),
+                      ('reflection', _reflection(mirror)), ('reflection', _reflection(mirror + np.pi/2))]
+
+    best = None
+    for kind, matrix in candidates:
+        moved = source_centered @ matrix.T
+        forward = target_tree.query(moved)[0].mean()
+        backward = cKDTree(moved).query(target_centered)[0].mean() if forward <= tolerance else np.inf
+        error = max(forward, backward)
+        if error <= tolerance and (best is None or error < best[3]):
+            best = (kind, matrix, target_center - source_center @ matrix.T, error)
+    return best
+
+def _mirror_axis(matrix, source_center, target_center):
+    """Axis line (a, b, c) of a reflection mapping one centroid to the other, and its glide along the axis."""
+    axis_angle = 0.5 * np.arctan2(matrix[1, 0], matrix[0, 0])
+    direction = np.array([np.cos(axis_angle), np.sin(axis_angle)])
+    normal = np.array([-direction[1], direction[0]])
+    midpoint = (source_center + target_center) / 2
+    glide = abs((target_center - source_center) @ direction)
+    return (normal[0], normal[1], -normal @ midpoint), axis_angle % np.pi, glide
+
+def _group_axes(mirrors, angle_tolerance, distance_tolerance):
+    """Cluster mirror axes that coincide within the tolerances, most supported first."""
+    axes = []
+    for mirror in mirrors:
+        (a, b, c), angle = mirror['axis'], mirror['axis_angle']
+        for axis in axes:
+            # Compare against the first axis of the cluster with both normals pointing the same way
+            (a0, b0, c0), angle0 = axis['line'], axis['angle']
+            sign = 1.0 if a*a0 + b*b0 >= 0 else -1.0
+            delta = abs((angle - angle0 + np.pi/2) % np.pi - np.pi/2)
+            if delta <= angle_tolerance and abs(sign*c - c0) <= distance_tolerance:
+                axis['pairs'].append(mirror['curves'])
+                break
+        else:
+            axes.append({'line': (a, b, c), 'angle': angle, 'pairs': [mirror['curves']]})
+    return sorted(axes, key=lambda axis: -len(axis['pairs']))
+
+def find_global_symmetry(regularized_paths, tolerance=2.0, radius=0.25, min_length=10.0, skip_types=('line',),
+                         angle_tolerance=np.radians(3)):
+    """
+    Symmetry between curves across a drawing. Every curve gets a rotation-
+    and reflection-invariant descriptor, and the descriptors are indexed in a
+    KD-tree, so only curves whose descriptors collide within radius are
+    compared. Each colliding pair is verified by match_transform, unless its
+    curves are already in one group, so n copies of a shape take n - 1
+    matches rather than n(n - 1)/2. Straight lines are skipped by default,
+    since any two of equal length are congruent.
+
+    Returns a dict with:
+      'pairs': verified pairs, each with the ((path, curve), (path, curve))
+        indices, the transform kind, matrix and offset, and the error. They
+        link each group rather than listing every congruent pair.
+      'mirror_axes': verified reflection pairs without glide, clustered into
+        axes (a, b, c) of ax + by + c = 0, each with the pairs it mirrors.
+      'repeats': groups of congruent curves, each a copy of another in the
+        group up to a rotation or reflection.
+    """
+    indices, samples, descriptors = [], [], []
+    for i, path in enumerate(regularized_paths):
+        for j, curve in enumerate(path):
+            if curve['type'] in skip_types:
+                continue
+            points = sample_curve(curve)
+            if points is None or len(points) < 2:
+                continue
+            resampled, length = resample_by_length(points)
+            if resampled is None or length < min_length:
+                continue
+            indices.append((i, j))
+            samples.append(resampled)
+            descriptors.append(shape_descriptor(resampled, length))
+    result = {'pairs': [], 'mirror_axes': [], 'repeats': []}
+    if len(descriptors) < 2:
+        return result
+
+    descriptors = np.array(descriptors)
+    candidates = cKDTree(descriptors).query_pairs(radius, output_type='ndarray')
+    candidates = candidates[np.lexsort((candidates[:, 1], candidates[:, 0]))]
+    parent = list(range(len(indices)))
+
+    def root(k):
+        while parent[k] != k:
+            parent[k] = parent[parent[k]]
+            k = parent[k]
+        return k
+
+    mirrors = []
+    for first, second in candidates:
+        if root(first) == root(second):
+            continue
+        match = match_transform(samples[first], samples[second], tolerance)
+        if match is None:
+            continue
+        kind, matrix, offset, error = match
+        pair = {'curves': (indices[first], indices[second]), 'transform': kind, 'matrix': matrix,
+                'offset': offset, 'error': error}
+        result['pairs'].append(pair)
+        parent[root(first)] = root(second)
+        if kind == 'reflection':
+            axis, axis_angle, glide = _mirror_axis(matrix, samples[first].mean(axis=0), samples[second].mean(axis=0))
+            if glide <= tolerance:
+                mirrors.append({'curves': pair['curves'], 'axis': axis, 'axis_angle': axis_angle})
+
+    result['mirror_axes'] = _group_axes(mirrors, angle_tolerance, tolerance)
+    groups = {}
+    for k in range(len(indices)):
+        groups.setdefault(root(k), []).append(indices[k])
+    result['repeats'] = [group for group in groups.values() if len(group) > 1]
+    return result
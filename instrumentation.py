@@ -0,0 +1,138 @@
+# File: instrumentation.py
+
+import sys
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+PIPELINE_STAGES = (
+    'extract', 'read_png', 'preprocess', 'edges', 'thinning', 'contours', 'tiles', 'stitch', 'simplify',
+    'dedup', 'regularize', 'segment', 'symmetry', 'global_symmetry', 'completion', 'visualize',
+)
+
+def _max_rss_bytes():
+    """High-water mark of the process resident set size, or None if unavailable."""
+    if resource is None:
+        return None
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+class PipelineProfiler:
+    """
+    Collect wall time, CPU time, memory and item counts for each pipeline stage.
+
+    Every finished stage becomes a record dict that is kept in self.records,
+    appended as a JSON line to jsonl_path and passed to callback. With
+    track_memory=True the per-stage peak of Python and NumPy allocations is
+    measured with tracemalloc; the process max RSS is always recorded.
+    With per_curve=True the regularization stage also emits one 'fit' record
+    per curve. context fields, e.g. the image path, are added to every record.
+    """
+
+    def __init__(self, jsonl_path=None, callback=None, track_memory=False, per_curve=False, context=None):
+        self.jsonl_path = jsonl_path
+        self.callback = callback
+        self.track_memory = track_memory
+        self.per_curve = per_curve
+        self.context = dict(context or {})
+        self.records = []
+        self._open_stages = []
+        self._started_tracemalloc = False
+
+    @contextmanager
+    def stage(self, name, **fields):
+        """Time the enclosed block; set record['items'] inside it to report an item count."""
+        record = {'stage': name, **self.context, **fields}
+        frame = self._enter_memory()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            record['wall_seconds'] = time.perf_counter() - wall_start
+            record['cpu_seconds'] = time.process_time() - cpu_start
+            if frame is not None:
+                record['peak_traced_bytes'] = self._exit_memory(frame)
+            record['max_rss_bytes'] = _max_rss_bytes()
+            self.emit(record)
+
+    def record_curve(self, path_index, curve_index, curve_type, seconds):
+        """Emit a per-curve fit timing when per_curve is enabled."""
+        if self.per_curve:
+            self.emit({'stage': 'fit', **self.context, 'path': path_index, 'curve': curve_index,
+                       'type': curve_type, 'wall_seconds': seconds})
+
+    def emit(self, record):
+        self.records.append(record)
+        if self.jsonl_path is not None:
+            # One write per record keeps lines intact when several processes append
+            with open(self.jsonl_path, 'a') as f:
+                f.write(json.dumps(record, default=str) + '\n')
+        if self.callback is not None:
+            self.callback(record)
+
+    def summary(self):
+        """
+        Total wall time, CPU time and items per stage, in pipeline order.
+        Stages that drop items, such as dedup, also total their 'removed' counts.
+        """
+        totals = {}
+        for record in self.records:
+            if record['stage'] == 'fit':
+                continue
+            total = totals.setdefault(record['stage'],
+                                      {'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'items': 0})
+            total['calls'] += 1
+            total['wall_seconds'] += record['wall_seconds']
+            total['cpu_seconds'] += record['cpu_seconds']
+            total['items'] += record.get('items') or 0
+            if 'removed' in record:
+                total['removed'] = total.get('removed', 0) + record['removed']
+        order = {stage: i for i, stage in enumerate(PIPELINE_STAGES)}
+        return dict(sorted(totals.items(), key=lambda item: order.get(item[0], len(order))))
+
+    def close(self):
+        if self._started_tracemalloc and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._started_tracemalloc = False
+
+    def _enter_memory(self):
+        if not self.track_memory:
+            return None
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        current, peak = tracemalloc.get_traced_memory()
+        # Fold the peak so far into enclosing stages before resetting it for this one
+        for frame in self._open_stages:
+            frame['peak'] = max(frame['peak'], peak - frame['base'])
+        tracemalloc.reset_peak()
+        frame = {'base': current, 'peak': 0}
+        self._open_stages.append(frame)
+        return frame
+
+    def _exit_memory(self, frame):
+        _, peak = tracemalloc.get_traced_memory()
+        self._open_stages.remove(frame)
+        for open_frame in self._open_stages:
+            open_frame['peak'] = max(open_frame['peak'], peak - open_frame['base'])
+        return max(frame['peak'], peak - frame['base'])
+
+class NullProfiler:
+    """Profiler stand-in that records nothing, used when no profiler is passed."""
+    per_curve = False
+
+    @contextmanager
+    def stage(self, name, **fields):
+        yield {}
+
+    def record_curve(self, path_index, curve_index, curve_type, seconds):
+        pass
+
+NULL_PROFILER = NullProfiler()
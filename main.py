@@ -1,99 +1,221 @@
 # File: main.py
 
 import os
+import sys
+import glob
+import time
+import argparse
 import numpy as np
-from png_processor import png_to_polylines, save_polylines_to_csv, test_ximgproc
-from curve_regularization import read_csv, process_paths
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from png_processor import png_to_polylines, png_to_polylines_tiled, test_ximgproc
+from polyline_store import STORE_EXTENSION
+from curve_regularization import process_paths, process_paths_batched, process_paths_parallel, batch_to_paths
+from curve_segmentation import process_segmentation
 from symmetry_detection import process_symmetry
+from global_symmetry import find_global_symmetry
 from curve_completion import process_occlusions
-from visualization import visualize_results, visualize_symmetry, test_visualization
+from visualization import visualize_results, visualize_symmetry, test_visualization, RENDERERS, RENDERER_EXTENSIONS
+from instrumentation import PipelineProfiler, NULL_PROFILER
+from stage_cache import StageCache, file_digest, DEFAULT_CACHE_BYTES
+
+def _silent(*args, **kwargs):
+    pass
+
+def _run_stage(cache, stage, keys, record, compute):
+    """Return compute(), or the stage output stored in the cache under keys[stage]."""
+    if cache is None:
+        return compute()
+    hit, value = cache.get(stage, keys[stage])
+    record['cached'] = hit
+    if not hit:
+        value = compute()
+        cache.put(stage, keys[stage], value)
+    return value
+
+def process_image(png_path, output_dir, save_polylines=None, verbose=True, profiler=None, tile_size=None,
+                  method='graph', renderer='plot', dpi=300, epsilon=1.0, threshold=0.1, segment_tolerance=None,
+                  dedup_tolerance=None, processes=False, cache=None):
+    """
+    Run the full pipeline on one PNG. save_polylines may be 'store' to write the
+    binary polyline store or 'csv' to export CSV; by default nothing is written.
+    verbose=False silences progress output (errors are still printed) and a
+    PipelineProfiler records per-stage timings, memory and item counts.
+    tile_size switches the raster stages to tiled processing for large images
+    and method picks the polyline tracer of extract_polylines. renderer and dpi
+    are passed to the visualizers. epsilon is the simplification tolerance,
+    dedup_tolerance the Hausdorff distance within which a polyline counts as a
+    duplicate of a longer one (by default derived from the stroke width, 0
+    keeps all), and threshold the shape fitting tolerance. Curves that match
+    no shape are split into line and arc segments with an RMS error of
+    segment_tolerance if given; by default they are kept whole and completed
+    by process_occlusions. processes=True runs the tiles and the
+    regularization on process pools that read the image and polylines from
+    shared memory. With a StageCache, the polyline, regularization,
+    segmentation, symmetry and completion outputs are reused across runs on
+    identical image bytes and parameters.
+    """
+    log = print if verbose else _silent
+    profiler = profiler or NULL_PROFILER
 
-def process_image(png_path, output_dir):
     # Create output directory if it doesn't exist
     os.makedirs(output_dir, exist_ok=True)
 
     # Generate base filename
     base_filename = os.path.splitext(os.path.basename(png_path))[0]
 
-    print(f"Processing {png_path}...")
+    log(f"Processing {png_path}...")
+
+    # Stage keys chain from the image bytes, so each stage only depends on its own and upstream parameters
+    keys = {}
+    if cache is not None:
+        keys['polylines'] = StageCache.key('polylines', file_digest(png_path), epsilon=epsilon,
+                                           tile_size=tile_size, method=method, dedup_tolerance=dedup_tolerance)
+        keys['regularize'] = StageCache.key('regularize', keys['polylines'], threshold=threshold)
+        keys['segment'] = StageCache.key('segment', keys['regularize'], tolerance=segment_tolerance)
+        keys['symmetry'] = StageCache.key('symmetry', keys['segment'])
+        keys['global_symmetry'] = StageCache.key('global_symmetry', keys['segment'])
+        keys['completion'] = StageCache.key('completion', keys['segment'])
 
     # Process PNG to polylines
     try:
-        polylines = png_to_polylines(png_path)
-        print(f"Successfully extracted {len(polylines)} polylines from the image.")
+        def extract():
+            if tile_size:
+                return png_to_polylines_tiled(png_path, epsilon, tile_size=tile_size, profiler=profiler,
+                                              method=method, as_store=True, processes=processes,
+                                              dedup_tolerance=dedup_tolerance)
+            return png_to_polylines(png_path, epsilon, profiler=profiler, method=method, as_store=True,
+                                    dedup_tolerance=dedup_tolerance)
+
+        with profiler.stage('extract') as record:
+            store = _run_stage(cache, 'polylines', keys, record, extract)
+            record['items'] = store.num_curves
+        log(f"Successfully extracted {store.num_curves} polylines from the image.")
     except Exception as e:
         print(f"Error during PNG to polyline conversion: {str(e)}")
-        return
+        return None
 
-    # Save polylines to CSV
-    csv_path = os.path.join(output_dir, f"{base_filename}_polylines.csv")
-    try:
-        save_polylines_to_csv(polylines, csv_path)
-        print(f"Polylines saved to {csv_path}")
-        print(f"CSV file size: {os.path.getsize(csv_path)} bytes")
-        with open(csv_path, 'r') as f:
-            print(f"First few lines of CSV:")
-            for i, line in enumerate(f):
-                if i < 5:  # Print first 5 lines
-                    print(line.strip())
-                else:
-                    break
-    except Exception as e:
-        print(f"Error saving polylines to CSV: {str(e)}")
-        return
+    # Polylines arrive in the columnar store; files are only written on request
+    if save_polylines is not None:
+        try:
+            if save_polylines == 'csv':
+                polylines_path = os.path.join(output_dir, f"{base_filename}_polylines.csv")
+                store.to_csv(polylines_path)
+            else:
+                polylines_path = os.path.join(output_dir, f"{base_filename}_polylines{STORE_EXTENSION}")
+                store.save(polylines_path)
+            log(f"Polylines saved to {polylines_path}")
+            log(f"Polyline file size: {os.path.getsize(polylines_path)} bytes")
+        except Exception as e:
+            print(f"Error saving polylines: {str(e)}")
+            return None
 
-    # Read CSV and regularize curves
+    # Regularize curves straight from the in-memory store
     try:
-        paths = read_csv(csv_path)
-        print(f"Successfully read {len(paths)} paths from CSV.")
-        regularized_paths = process_paths(paths)
-        print(f"Successfully regularized {len(regularized_paths)} paths.")
-        print("Regularized paths summary:")
-        for i, path in enumerate(regularized_paths):
-            print(f"  Path {i+1}: {len(path)} curves")
-            for j, curve in enumerate(path):
-                print(f"    Curve {j+1}: Type - {curve['type']}")
+        log(f"Packed {store.num_points} points into {store.num_paths} paths.")
+        def regularize():
+            if profiler.per_curve:
+                # Per-curve timings need the per-curve path instead of the batched one
+                return process_paths(store.to_paths(), profiler=profiler, threshold=threshold)
+            if processes:
+                return batch_to_paths(process_paths_parallel(store, threshold=threshold))
+            return batch_to_paths(process_paths_batched(store, threshold=threshold))
+
+        with profiler.stage('regularize') as record:
+            regularized_paths = _run_stage(cache, 'regularize', keys, record, regularize)
+            record['items'] = store.num_curves
+        log(f"Successfully regularized {len(regularized_paths)} paths.")
+        if verbose:
+            print("Regularized paths summary:")
+            for i, path in enumerate(regularized_paths):
+                print(f"  Path {i+1}: {len(path)} curves")
+                for j, curve in enumerate(path):
+                    print(f"    Curve {j+1}: Type - {curve['type']}")
     except Exception as e:
         print(f"Error during curve regularization: {str(e)}")
-        return
+        return None
+
+    # Split curves that match no single shape into primitive segments
+    if segment_tolerance:
+        try:
+            with profiler.stage('segment') as record:
+                regularized_paths = _run_stage(cache, 'segment', keys, record,
+                                               lambda: process_segmentation(regularized_paths, segment_tolerance))
+                record['items'] = sum(len(path) for path in regularized_paths)
+            log(f"Segmented unmatched curves into {record['items']} curves.")
+        except Exception as e:
+            print(f"Error during curve segmentation: {str(e)}")
 
     # Detect symmetry in regularized paths
     try:
-        symmetry_results = process_symmetry(regularized_paths)
-        print("Symmetry detection completed.")
+        with profiler.stage('symmetry') as record:
+            symmetry_results = _run_stage(cache, 'symmetry', keys, record,
+                                          lambda: process_symmetry(regularized_paths))
+            # Segmentation may have split curves, so count what was actually checked
+            record['items'] = sum(len(path) for path in regularized_paths)
+        log("Symmetry detection completed.")
     except Exception as e:
         print(f"Error during symmetry detection: {str(e)}")
         symmetry_results = None
 
+    # Mirror axes and repeated copies across curves
+    try:
+        with profiler.stage('global_symmetry') as record:
+            global_symmetry = _run_stage(cache, 'global_symmetry', keys, record,
+                                         lambda: find_global_symmetry(regularized_paths))
+            record['items'] = len(global_symmetry['pairs'])
+        log(f"Found {len(global_symmetry['mirror_axes'])} mirror axes and "
+            f"{len(global_symmetry['repeats'])} groups of repeated curves.")
+        if verbose:
+            for axis in global_symmetry['mirror_axes']:
+                a, b, c = axis['line']
+                print(f"  Mirror axis {a:.3f}x + {b:.3f}y + {c:.1f} = 0 across {len(axis['pairs'])} curve pairs")
+            for group in global_symmetry['repeats']:
+                print(f"  Repeated curves: {', '.join(f'path {i+1} curve {j+1}' for i, j in group)}")
+    except Exception as e:
+        print(f"Error during global symmetry detection: {str(e)}")
+
     # Complete occluded curves
     try:
-        completed_paths = process_occlusions(regularized_paths)
-        print("Curve completion process finished.")
-        print("Completed paths summary:")
-        for i, path in enumerate(completed_paths):
-            print(f"  Path {i+1}: {len(path)} curves")
-            for j, curve in enumerate(path):
-                print(f"    Curve {j+1}: Type - {curve['type']}")
+        with profiler.stage('completion') as record:
+            completed_paths = _run_stage(cache, 'completion', keys, record,
+                                         lambda: process_occlusions(regularized_paths))
+            record['items'] = sum(curve['type'] == 'completed' for path in completed_paths for curve in path)
+        log("Curve completion process finished.")
+        if verbose:
+            print("Completed paths summary:")
+            for i, path in enumerate(completed_paths):
+                print(f"  Path {i+1}: {len(path)} curves")
+                for j, curve in enumerate(path):
+                    print(f"    Curve {j+1}: Type - {curve['type']}")
     except Exception as e:
         print(f"Error during curve completion: {str(e)}")
         completed_paths = regularized_paths  # Use regularized paths if completion fails
 
     # Visualize results
     try:
-        print(f"Preparing to visualize results for {len(completed_paths)} paths")
-        results_path = os.path.join(output_dir, f"{base_filename}_results.png")
-        visualize_results(completed_paths, results_path)
-        print(f"Checking if results visualization was saved: {os.path.exists(results_path)}")
-        if symmetry_results:
-            print(f"Preparing to visualize symmetry for {len(symmetry_results)} paths")
-            symmetry_path = os.path.join(output_dir, f"{base_filename}_symmetry.png")
-            visualize_symmetry(completed_paths, symmetry_results, symmetry_path)
-            print(f"Checking if symmetry visualization was saved: {os.path.exists(symmetry_path)}")
-        print(f"Visualizations should be saved to {output_dir}/{base_filename}_results.png and {base_filename}_symmetry.png")
+        with profiler.stage('visualize') as record:
+            log(f"Preparing to visualize results for {len(completed_paths)} paths")
+            extension = RENDERER_EXTENSIONS[renderer]
+            results_path = os.path.join(output_dir, f"{base_filename}_results{extension}")
+            visualize_results(completed_paths, results_path, verbose=verbose, renderer=renderer, dpi=dpi)
+            log(f"Checking if results visualization was saved: {os.path.exists(results_path)}")
+            record['items'] = 1
+            if symmetry_results:
+                log(f"Preparing to visualize symmetry for {len(symmetry_results)} paths")
+                symmetry_path = os.path.join(output_dir, f"{base_filename}_symmetry{extension}")
+                visualize_symmetry(completed_paths, symmetry_results, symmetry_path, verbose=verbose,
+                                   renderer=renderer, dpi=dpi)
+                log(f"Checking if symmetry visualization was saved: {os.path.exists(symmetry_path)}")
+                record['items'] = 2
+        log(f"Visualizations should be saved to {output_dir}/{base_filename}_results{extension} and "
+            f"{base_filename}_symmetry{extension}")
     except Exception as e:
         print(f"An error occurred during visualization: {str(e)}")
         print("Continuing with text output...")
 
+    if not verbose:
+        return completed_paths
+
     # Print results
     print(f"\nProcessed {png_path}")
     print(f"Number of paths: {len(completed_paths)}")
@@ -111,30 +233,234 @@ def process_image(png_path, output_dir):
                 print(f"    Type: {curve['type']}")
                 if 'params' in curve:
                     print(f"    Params: {curve['params']}")
-            if symmetry_results:
+            if symmetry_results and j < len(symmetry_results[i]):
+                # Bridges appended by process_occlusions have no symmetry entry
                 symmetry = symmetry_results[i][j]
                 if symmetry is not None:
                     print(f"    Symmetry: Reflection - {symmetry['reflection']}, Rotation - {symmetry['rotation']}")
                 else:
                     print("    Symmetry: Could not be determined")
 
-def main():
+    return completed_paths
+
+def collect_png_paths(sources):
+    """Expand files, directories and glob patterns into a sorted list of PNG paths."""
+    if isinstance(sources, str):
+        sources = [sources]
+    png_paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            matches = glob.glob(os.path.join(source, '**', '*.png'), recursive=True)
+        elif glob.has_magic(source):
+            matches = glob.glob(source, recursive=True)
+        else:
+            matches = [source]
+        png_paths.extend(sorted(matches))
+    # Drop duplicates from overlapping sources while keeping the first occurrence
+    return list(dict.fromkeys(png_paths))
+
+def batch_output_dirs(png_paths, output_dir):
+    """
+    Output directory of each image in a batch: its directory relative to the
+    common root of all the inputs, mirrored under output_dir, so images with
+    the same name in different directories do not overwrite each other.
+    """
+    directories = [os.path.dirname(os.path.abspath(png_path)) for png_path in png_paths]
+    if not directories:
+        return []
+    root = os.path.commonpath(directories)
+    return [os.path.normpath(os.path.join(output_dir, os.path.relpath(directory, root))) for directory in directories]
+
+def _process_image_task(png_path, output_dir, save_polylines=None, verbose=True, profile_options=None,
+                        cache_options=None, **image_options):
+    """Run process_image in a worker and report the outcome instead of raising."""
+    start = time.perf_counter()
+    profiler = None
+    if profile_options is not None:
+        profiler = PipelineProfiler(context={'image': png_path}, **profile_options)
+    cache = StageCache(**cache_options) if cache_options is not None else None
+    try:
+        completed_paths = process_image(png_path, output_dir, save_polylines, verbose, profiler, cache=cache,
+                                        **image_options)
+        error = None if completed_paths is not None else "processing aborted, see log output"
+    except Exception as e:
+        completed_paths = None
+        error = f"{type(e).__name__}: {str(e)}"
+    finally:
+        if profiler is not None:
+            profiler.close()
+    result = {
+        'path': png_path,
+        'ok': error is None,
+        'error': error,
+        'num_paths': len(completed_paths) if completed_paths is not None else 0,
+        'seconds': time.perf_counter() - start,
+    }
+    if cache is not None:
+        result['cache'] = {'hits': cache.stats['hits'], 'misses': cache.stats['misses']}
+    return result
+
+def process_batch(sources, output_dir, workers=None, ordered=True, on_result=None, save_polylines=None,
+                  verbose=True, profile_options=None, cache_options=None, **image_options):
+    """
+    Process many PNGs in parallel with one process_image call per worker task.
+    Failures are isolated per image and collected in the returned summary.
+    profile_options are PipelineProfiler keyword arguments for a profiler per
+    image; use a jsonl_path to collect the records, callbacks stay in the workers.
+    cache_options are StageCache keyword arguments; workers share the cache
+    directory. Outputs go to the directories from batch_output_dirs. Other
+    keyword arguments are passed on to process_image.
+    """
+    png_paths = collect_png_paths(sources)
+    output_dirs = batch_output_dirs(png_paths, output_dir)
+    workers = workers or os.cpu_count() or 1
+    results = []
+
+    start = time.perf_counter()
+    if png_paths:
+        with ProcessPoolExecutor(max_workers=min(workers, len(png_paths))) as executor:
+            futures = {executor.submit(_process_image_task, png_path, image_output_dir, save_polylines,
+                                       verbose, profile_options, cache_options, **image_options): png_path
+                       for png_path, image_output_dir in zip(png_paths, output_dirs)}
+            pending = list(futures) if ordered else as_completed(futures)
+            for future in pending:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # A worker that dies outright (e.g. a crash in native code) lands here
+                    result = {'path': futures[future], 'ok': False, 'num_paths': 0, 'seconds': None,
+                              'error': f"{type(e).__name__}: {str(e)}"}
+                results.append(result)
+                if on_result is not None:
+                    on_result(result)
+    elapsed = time.perf_counter() - start
+
+    failures = [result for result in results if not result['ok']]
+    cached = [result['cache'] for result in results if 'cache' in result]
+    return {
+        'total': len(results),
+        'succeeded': len(results) - len(failures),
+        'failed': len(failures),
+        'workers': workers,
+        'elapsed_seconds': elapsed,
+        'images_per_second': len(results) / elapsed if elapsed > 0 else 0.0,
+        'failures': failures,
+        'cache': {'hits': sum(stats['hits'] for stats in cached),
+                  'misses': sum(stats['misses'] for stats in cached)} if cached else None,
+        'results': results,
+    }
+
+def print_batch_summary(summary):
+    """Print a short report for a process_batch summary."""
+    print(f"\nBatch finished: {summary['succeeded']}/{summary['total']} images succeeded "
+          f"with {summary['workers']} workers")
+    print(f"Elapsed: {summary['elapsed_seconds']:.2f} s, "
+          f"throughput: {summary['images_per_second']:.2f} images/s")
+    if summary.get('cache'):
+        print(f"Stage cache: {summary['cache']['hits']} hits, {summary['cache']['misses']} misses")
+    for failure in summary['failures']:
+        print(f"  FAILED {failure['path']}: {failure['error']}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Detect, regularize and complete curves in PNG drawings.")
+    parser.add_argument('inputs', nargs='*', default=["./png/simplify.png"],
+                        help="PNG files, directories or glob patterns to process")
+    parser.add_argument('-o', '--output-dir', default="output", help="Directory for output files")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="Number of worker processes for batch mode (default: CPU count)")
+    parser.add_argument('--unordered', action='store_true',
+                        help="Report batch results as they complete instead of in input order")
+    parser.add_argument('--save-polylines', choices=['store', 'csv'], default=None,
+                        help="Write extracted polylines as a binary store or export them as CSV")
+    parser.add_argument('--tile-size', type=int, default=None,
+                        help="Process the image in tiles of this many pixels to bound memory on very large inputs")
+    parser.add_argument('--tracer', choices=['graph', 'contours'], default='graph',
+                        help="Trace the skeleton as a pixel graph or outline it with find_contours")
+    parser.add_argument('--renderer', choices=RENDERERS, default='plot',
+                        help="'plot' labels every curve; 'collections', 'svg' and 'raster' draw one batch per type")
+    parser.add_argument('--dpi', type=int, default=300, help="Resolution of the rendered visualizations")
+    parser.add_argument('--epsilon', type=float, default=1.0, help="Polyline simplification tolerance in pixels")
+    parser.add_argument('--dedup-tolerance', type=float, default=None,
+                        help="Drop polylines within this Hausdorff distance in pixels of a longer one "
+                             "(default: from the stroke width, 0 disables)")
+    parser.add_argument('--threshold', type=float, default=0.1, help="Maximum residual for a shape fit to match")
+    parser.add_argument('--segment-tolerance', type=float, default=None,
+                        help="Split unmatched curves into lines and arcs with this RMS error in pixels "
+                             "instead of completing them whole")
+    parser.add_argument('--processes', action='store_true',
+                        help="Run tiles and regularization on process pools sharing buffers in shared memory")
+    parser.add_argument('--cache-dir', default=None,
+                        help="Reuse stage outputs for repeated images and parameters from this directory")
+    parser.add_argument('--cache-size-mb', type=float, default=DEFAULT_CACHE_BYTES / 2**20,
+                        help="Evict least recently used cache entries beyond this size")
+    parser.add_argument('-q', '--quiet', action='store_true', help="Only print errors and the batch summary")
+    parser.add_argument('--profile', metavar='JSONL', default=None,
+                        help="Append per-stage timing and memory records to this JSON lines file")
+    parser.add_argument('--profile-memory', action='store_true',
+                        help="Measure per-stage peak allocations with tracemalloc (adds overhead)")
+    parser.add_argument('--profile-curves', action='store_true', help="Also record a fit timing for every curve")
+    return parser.parse_args(argv)
+
+def print_profile_summary(profiler):
+    """Print per-stage totals collected by a PipelineProfiler."""
+    summary = profiler.summary()
+    print(f"\n{'stage':<12} {'calls':>5} {'wall (s)':>10} {'cpu (s)':>10} {'items':>10}")
+    for stage, total in summary.items():
+        print(f"{stage:<12} {total['calls']:>5} {total['wall_seconds']:>10.3f} "
+              f"{total['cpu_seconds']:>10.3f} {total['items']:>10}")
+    for stage, total in summary.items():
+        if 'removed' in total:
+            print(f"{stage} removed {total['removed']} polylines")
+
+def main(argv=None):
+    args = parse_args(argv)
+
     # Test for ximgproc availability
-    if not test_ximgproc():
+    if not test_ximgproc(verbose=not args.quiet):
         print("ximgproc is not available. The program may not function correctly.")
         return
 
     # Test visualization
-    test_visualization()
+    if not args.quiet:
+        test_visualization()
 
-    # Example usage
-    png_path = "./png/simplify.png"  # Replace with your PNG file path
-    output_dir = "output"
-    
-    try:
-        process_image(png_path, output_dir)
-    except Exception as e:
-        print(f"An unexpected error occurred while processing the image: {str(e)}")
+    profile_options = None
+    if args.profile or args.profile_memory or args.profile_curves:
+        profile_options = {'jsonl_path': args.profile, 'track_memory': args.profile_memory,
+                           'per_curve': args.profile_curves}
+
+    cache_options = None
+    if args.cache_dir:
+        cache_options = {'cache_dir': args.cache_dir, 'max_bytes': int(args.cache_size_mb * 2**20)}
+    image_options = {'tile_size': args.tile_size, 'method': args.tracer, 'renderer': args.renderer,
+                     'dpi': args.dpi, 'epsilon': args.epsilon, 'threshold': args.threshold,
+                     'dedup_tolerance': args.dedup_tolerance, 'segment_tolerance': args.segment_tolerance,
+                     'processes': args.processes}
+
+    png_paths = collect_png_paths(args.inputs)
+    if len(png_paths) == 1 and args.workers is None:
+        profiler = None
+        if profile_options is not None:
+            profiler = PipelineProfiler(context={'image': png_paths[0]}, **profile_options)
+        cache = StageCache(**cache_options) if cache_options is not None else None
+        try:
+            process_image(png_paths[0], args.output_dir, args.save_polylines, not args.quiet, profiler,
+                          cache=cache, **image_options)
+        except Exception as e:
+            print(f"An unexpected error occurred while processing the image: {str(e)}")
+        if profiler is not None:
+            profiler.close()
+            print_profile_summary(profiler)
+        if cache is not None and not args.quiet:
+            print(f"Stage cache: {cache.stats['hits']} hits, {cache.stats['misses']} misses, "
+                  f"{cache.stats['evictions']} evictions")
+        return
+
+    summary = process_batch(png_paths, args.output_dir, workers=args.workers, ordered=not args.unordered,
+                            save_polylines=args.save_polylines, verbose=not args.quiet,
+                            profile_options=profile_options, cache_options=cache_options, **image_options)
+    print_batch_summary(summary)
+    return 1 if summary['failed'] else 0
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
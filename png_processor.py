@@ -1,19 +1,30 @@
 # File: png_processor.py
 
+import os
 import numpy as np
 import cv2
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from scipy import ndimage
+from scipy.spatial import cKDTree
+from scipy.spatial.distance import directed_hausdorff
 from skimage import measure
+from polyline_store import PolylineStore
+from skeleton_graph import trace_skeleton
+from instrumentation import NULL_PROFILER
+from shared_buffers import SharedArena, call_with_shared
 
-def test_ximgproc():
-    """Test if the ximgproc module is available."""
-    try:
-        cv2.ximgproc
-        print("ximgproc module is available.")
-        return True
-    except AttributeError:
+_ximgproc_available = None
+
+def test_ximgproc(verbose=True):
+    """Test if the ximgproc module is available. The check runs once per process."""
+    global _ximgproc_available
+    if _ximgproc_available is None:
+        _ximgproc_available = hasattr(cv2, 'ximgproc')
+    if not _ximgproc_available:
         print("ximgproc module is not available. Please install opencv-contrib-python.")
-        return False
+    elif verbose:
+        print("ximgproc module is available.")
+    return _ximgproc_available
 
 def read_png(png_path):
     """Read a PNG image and return it as a grayscale numpy array."""
@@ -35,36 +46,427 @@ def detect_edges(binary_image):
 
 def thin_edges(edges):
     """Apply morphological thinning to the edges."""
-    if not test_ximgproc():
+    if not test_ximgproc(verbose=False):
         raise ImportError("ximgproc module is required for edge thinning.")
     thinned = cv2.ximgproc.thinning(edges)
     return thinned
 
-def extract_polylines(thinned_edges):
-    """Extract polylines from the thinned edges."""
-    contours = measure.find_contours(thinned_edges, 0.5)
-    return contours
+def extract_polylines(thinned_edges, method='graph'):
+    """
+    Extract polylines from the thinned edges. 'graph' traces the skeleton as a
+    pixel graph and emits each stroke once, split at junctions; 'contours' uses
+    measure.find_contours, which outlines both sides of every stroke.
+    """
+    if method == 'graph':
+        return trace_skeleton(thinned_edges)[0]
+    if method == 'contours':
+        return measure.find_contours(thinned_edges, 0.5)
+    raise ValueError(f"Unknown polyline extraction method: {method}")
 
 def simplify_polyline(polyline, epsilon=1.0):
     """Simplify a polyline using the Douglas-Peucker algorithm."""
     return measure.approximate_polygon(polyline, tolerance=epsilon)
 
-def png_to_polylines(png_path, epsilon=1.0):
-    """Convert a PNG image to a list of polylines."""
-    image = read_png(png_path)
-    binary = preprocess_image(image)
+SIMPLIFY_METHODS = ('douglas-peucker', 'radial')
+
+def _douglas_peucker_mask(coords, offsets, tolerance):
+    """
+    Douglas-Peucker on every curve at once. All open segments of all curves are
+    split together, one recursion level per iteration, using the same distance
+    rule as measure.approximate_polygon: perpendicular distance when a point
+    projects inside the segment, otherwise distance to the nearer end.
+    """
+    counts = np.diff(offsets)
+    keep = np.zeros(len(coords), dtype=bool)
+    keep[offsets[:-1][counts > 0]] = True
+    keep[offsets[1:][counts > 0] - 1] = True
+    starts, ends = offsets[:-1][counts > 2], offsets[1:][counts > 2] - 1
+    while len(starts):
+        inner = ends - starts - 1
+        segment_starts = np.zeros(len(inner), dtype=np.int64)
+        np.cumsum(inner[:-1], out=segment_starts[1:])
+        segment_ids = np.repeat(np.arange(len(inner)), inner)
+        point_ids = np.repeat(starts + 1 - segment_starts, inner) + np.arange(inner.sum())
+
+        r0, c0 = coords[starts, 0], coords[starts, 1]
+        r1, c1 = coords[ends, 0], coords[ends, 1]
+        dr, dc = r1 - r0, c1 - c0
+        segment_angle = -np.arctan2(dr, dc)
+        cos_angle, sin_angle = np.cos(segment_angle), np.sin(segment_angle)
+        segment_dist = c0 * sin_angle + r0 * cos_angle
+
+        r, c = coords[point_ids, 0], coords[point_ids, 1]
+        dr0, dc0 = r - r0[segment_ids], c - c0[segment_ids]
+        dr1, dc1 = r - r1[segment_ids], c - c1[segment_ids]
+        perp = (dr0 * dr[segment_ids] + dc0 * dc[segment_ids] > 0) & \
+               (-dr1 * dr[segment_ids] - dc1 * dc[segment_ids] > 0)
+        dists = np.where(perp,
+                         np.abs(r * cos_angle[segment_ids] + c * sin_angle[segment_ids] - segment_dist[segment_ids]),
+                         np.minimum(np.sqrt(dc0 ** 2 + dr0 ** 2), np.sqrt(dc1 ** 2 + dr1 ** 2)))
+
+        # Split each segment at its first farthest point, as argmax would
+        segment_max = np.maximum.reduceat(dists, segment_starts)
+        farthest = np.flatnonzero(dists == segment_max[segment_ids])
+        _, first = np.unique(segment_ids[farthest], return_index=True)
+        split_ids = segment_ids[farthest[first]]
+        split = segment_max[split_ids] > tolerance
+        split_ids, mids = split_ids[split], point_ids[farthest[first]][split]
+        keep[mids] = True
+
+        # Children with no interior points are finished
+        starts = np.concatenate([starts[split_ids], mids])
+        ends = np.concatenate([mids, ends[split_ids]])
+        open_segments = ends - starts > 1
+        starts, ends = starts[open_segments], ends[open_segments]
+    return keep
+
+def _radial_mask(coords, offsets, tolerance):
+    """
+    Radial-distance simplification: keep the first point of every tolerance-long
+    stretch of arc length. Every dropped point is within tolerance of the last
+    kept point, as with the sequential algorithm, but it vectorizes fully.
+    """
+    counts = np.diff(offsets)
+    steps = np.zeros(len(coords))
+    steps[1:] = np.hypot(*np.diff(coords, axis=0).T)
+    curve_starts = offsets[:-1][counts > 0]
+    steps[curve_starts] = 0.0
+    arc_length = np.cumsum(steps)
+    arc_length -= np.repeat(arc_length[curve_starts], counts[counts > 0])
+    bins = np.floor(arc_length / tolerance)
+    keep = np.ones(len(coords), dtype=bool)
+    keep[1:] = bins[1:] != bins[:-1]
+    keep[curve_starts] = True
+    keep[offsets[1:][counts > 0] - 1] = True
+    return keep
+
+def simplify_polylines(store, epsilon=1.0, method='douglas-peucker'):
+    """
+    Simplify every curve of a PolylineStore in one batch and return a new store
+    with the same path layout. 'douglas-peucker' gives the same points as
+    simplify_polyline per curve; 'radial' is a cheaper single pass that keeps a
+    point at least every epsilon along each curve.
+    """
+    if method not in SIMPLIFY_METHODS:
+        raise ValueError(f"Unknown simplification method: {method}")
+    coords = np.asarray(store.coords, dtype=np.float64)
+    offsets = np.asarray(store.curve_offsets, dtype=np.int64)
+    if epsilon <= 0 or len(coords) == 0:
+        return PolylineStore(coords, offsets, store.path_offsets)
+    if method == 'douglas-peucker':
+        keep = _douglas_peucker_mask(coords, offsets, epsilon)
+    else:
+        keep = _radial_mask(coords, offsets, epsilon)
+    kept_before = np.zeros(len(coords) + 1, dtype=np.int64)
+    np.cumsum(keep, out=kept_before[1:])
+    return PolylineStore(coords[keep], kept_before[offsets], store.path_offsets)
+
+# Wider foreground regions are filled shapes whose two outlines are separate curves
+MAX_DEDUP_STROKE_WIDTH = 8.0
+
+def stroke_width(binary_image):
+    """
+    Typical width in pixels of the strokes in a binary image: twice the median
+    distance transform along their ridges. 0 when there is no foreground.
+    """
+    distances = cv2.distanceTransform(binary_image, cv2.DIST_L2, cv2.DIST_MASK_PRECISE)
+    ridges = (distances > 0) & (distances >= cv2.dilate(distances, np.ones((3, 3), np.uint8)))
+    return 2.0 * float(np.median(distances[ridges])) if ridges.any() else 0.0
+
+def dedup_tolerance_for(stroke, edge, epsilon=1.0):
+    """
+    Hausdorff tolerance within which two traced polylines are copies of one
+    stroke. The two edges of a stroke up to MAX_DEDUP_STROKE_WIDTH wide lie a
+    stroke width apart, copies traced along one edge lie within the edge
+    width, and simplification moves each copy by up to epsilon.
+    """
+    return max(edge, stroke if stroke <= MAX_DEDUP_STROKE_WIDTH else 0.0) + 2 * epsilon
+
+def _densify(points, spacing):
+    """Points along a polyline no further than spacing apart, so vertex distances bound curve distances."""
+    if len(points) < 2:
+        return points
+    steps = np.maximum(np.ceil(np.hypot(*np.diff(points, axis=0).T) / spacing).astype(np.int64), 1)
+    t = np.concatenate([np.arange(step) / step for step in steps])
+    starts = np.repeat(np.arange(len(steps)), steps)
+    dense = points[starts] + (points[starts + 1] - points[starts]) * t[:, None]
+    return np.vstack([dense, points[-1:]])
+
+def deduplicate_polylines(store, tolerance=2.0, removable=None):
+    """
+    Drop polylines that lie within tolerance of a longer polyline, such as the
+    two contours traced along either side of a stroke or overlapping strokes.
+    Polylines are densified and hashed into grid cells of twice the tolerance,
+    so only polylines that share a cell and whose bounding box fits in the
+    longer one's box plus tolerance are compared. The comparison is the
+    directed Hausdorff distance from the shorter polyline to the longer one,
+    so partial overlaps covered by a longer stroke are removed as well.
+    removable is an optional boolean mask of the polylines that may be dropped;
+    the others are always kept and only serve as references. Returns the
+    deduplicated PolylineStore and a boolean mask of the input polylines that
+    were kept.
+    """
+    polylines = [np.asarray(polyline, dtype=np.float64) for polyline in store.to_polylines()]
+    if len(polylines) < 2 or tolerance <= 0:
+        return store, np.ones(len(polylines), dtype=bool)
+    dense = [_densify(polyline, tolerance / 2) for polyline in polylines]
+    lengths = np.array([np.hypot(*np.diff(points, axis=0).T).sum() if len(points) > 1 else 0.0
+                        for points in polylines])
+    lows = np.array([points.min(axis=0) for points in dense])
+    highs = np.array([points.max(axis=0) for points in dense])
+
+    # Spatial hash: the cells each polyline passes through
+    cell_size = 2 * tolerance
+    cells = {}
+    for index, points in enumerate(dense):
+        for cell in set(map(tuple, np.floor(points / cell_size).astype(np.int64).tolist())):
+            cells.setdefault(cell, []).append(index)
+
+    removed = np.zeros(len(polylines), dtype=bool)
+    # Longest first, so each polyline is only checked against longer ones still kept
+    order = np.argsort(-lengths, kind='stable')
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    for index in order:
+        if removable is not None and not removable[index]:
+            continue
+        candidates = set()
+        for cell in set(map(tuple, np.floor(dense[index] / cell_size).astype(np.int64).tolist())):
+            candidates.update(other for other in cells[cell] if rank[other] < rank[index] and not removed[other])
+        for other in candidates:
+            if np.any(lows[index] < lows[other] - tolerance) or np.any(highs[index] > highs[other] + tolerance):
+                continue
+            if directed_hausdorff(dense[index], dense[other])[0] <= tolerance:
+                removed[index] = True
+                break
+    if not removed.any():
+        return store, ~removed
+    return PolylineStore.from_polylines([polyline for polyline, drop in zip(polylines, removed) if not drop]), ~removed
+
+def png_to_polylines(png_path, epsilon=1.0, profiler=None, method='graph', return_topology=False,
+                     simplify='douglas-peucker', as_store=False, dedup_tolerance=None):
+    """
+    Convert a PNG image to a list of polylines, timing each stage with profiler
+    if given. With method='graph' and return_topology=True the skeleton junction
+    topology from trace_skeleton is returned as well. simplify picks the
+    simplify_polylines method; as_store=True returns the simplified polylines as
+    a PolylineStore instead of a list. Polylines within dedup_tolerance of a
+    longer one are dropped by deduplicate_polylines, and the 'dedup' stage
+    record reports how many; 0 keeps them all. By default the tolerance comes
+    from the stroke and edge widths through dedup_tolerance_for.
+    """
+    profiler = profiler or NULL_PROFILER
+    with profiler.stage('read_png') as record:
+        image = read_png(png_path)
+        record['items'] = image.size
+    with profiler.stage('preprocess') as record:
+        binary = preprocess_image(image)
+        record['items'] = binary.size
+    with profiler.stage('edges') as record:
+        edges = detect_edges(binary)
+        record['items'] = cv2.countNonZero(edges)
+    with profiler.stage('thinning') as record:
+        thinned = thin_edges(edges)
+        record['items'] = cv2.countNonZero(thinned)
+    topology = None
+    with profiler.stage('contours', method=method) as record:
+        if method == 'graph':
+            polylines, topology = trace_skeleton(thinned)
+            record['junctions'] = topology['node_types'].count('junction')
+        else:
+            polylines = extract_polylines(thinned, method)
+        record['items'] = len(polylines)
+    with profiler.stage('simplify', method=simplify) as record:
+        store = simplify_polylines(PolylineStore.from_polylines(polylines), epsilon, simplify)
+        record['items'] = store.num_points
+    with profiler.stage('dedup') as record:
+        if dedup_tolerance is None:
+            dedup_tolerance = dedup_tolerance_for(stroke_width(binary), stroke_width(edges), epsilon)
+        store, kept = deduplicate_polylines(store, dedup_tolerance)
+        record['tolerance'] = dedup_tolerance
+        if topology is not None:
+            topology['edges'] = [edge for edge, keep in zip(topology['edges'], kept) if keep]
+        record['items'] = store.num_curves
+        record['removed'] = int(len(kept) - kept.sum())
+    simplified_polylines = store if as_store else store.to_polylines()
+    if return_topology:
+        return simplified_polylines, topology
+    return simplified_polylines
+
+# Context each tile needs beyond its core: 2 px for the 5x5 blur, 2 px for the
+# Canny Sobel and non-maximum suppression, and room for thinning strokes up to
+# about 24 px wide.
+DEFAULT_TILE_HALO = 16
+
+def open_image(image_path):
+    """
+    Open an image for tiled reading. Raw .npy grayscale arrays are memory-mapped
+    so only the tiles being processed are resident; other formats are decoded
+    once with read_png.
+    """
+    if image_path.endswith('.npy'):
+        image = np.load(image_path, mmap_mode='r')
+        if image.ndim != 2 or image.dtype != np.uint8:
+            raise ValueError(f"Expected a 2D uint8 array in {image_path}")
+        return image
+    return read_png(image_path)
+
+def tile_windows(shape, tile_size, halo):
+    """
+    Split an image into core tiles that overlap by one pixel row/column, each
+    with a halo window clipped to the image. Yields (core, window) boxes as
+    (row0, row1, col0, col1) with exclusive ends.
+    """
+    height, width = shape
+    for row0 in range(0, max(height - 1, 1), tile_size):
+        for col0 in range(0, max(width - 1, 1), tile_size):
+            # The extra row/column is shared with the next tile so contours meet exactly
+            core = (row0, min(row0 + tile_size + 1, height), col0, min(col0 + tile_size + 1, width))
+            window = (max(core[0] - halo, 0), min(core[1] + halo, height),
+                      max(core[2] - halo, 0), min(core[3] + halo, width))
+            yield core, window
+
+def _process_tile(image, core, window, method='graph'):
+    """
+    Run the raster stages on one halo window and trace polylines in its core.
+    Returns the polylines and the (stroke, edge) widths of the core.
+    """
+    tile = np.ascontiguousarray(image[window[0]:window[1], window[2]:window[3]])
+    binary = preprocess_image(tile)
     edges = detect_edges(binary)
     thinned = thin_edges(edges)
-    polylines = extract_polylines(thinned)
-    simplified_polylines = [simplify_polyline(polyline, epsilon) for polyline in polylines]
-    return simplified_polylines
+    rows, cols = slice(core[0] - window[0], core[1] - window[0]), slice(core[2] - window[2], core[3] - window[2])
+    widths = (stroke_width(binary[rows, cols]), stroke_width(edges[rows, cols]))
+    return [contour + (core[0], core[2]) for contour in extract_polylines(thinned[rows, cols], method)], widths
+
+def tile_dedup_tolerance(tile_widths, epsilon=1.0):
+    """dedup_tolerance_for the median stroke and edge widths of the tiles that have any."""
+    strokes = [stroke for stroke, _ in tile_widths if stroke > 0]
+    edges = [edge for _, edge in tile_widths if edge > 0]
+    return dedup_tolerance_for(float(np.median(strokes)) if strokes else 0.0,
+                               float(np.median(edges)) if edges else 0.0, epsilon)
+
+def stitch_polylines(pieces, tolerance=1e-6, seams=None, groups=False):
+    """
+    Join polylines whose endpoints lie within tolerance of each other, as
+    happens where strokes cross a tile border. seams=(rows, cols) limits the
+    joins to endpoints on those tile border rows and columns, so junctions
+    inside a tile are left split. Coinciding endpoints are merged into one point.
+    With groups=True the indices of the pieces in each stitched polyline are
+    returned as well, in chain order.
+    """
+    ends = []
+    for index, piece in enumerate(pieces):
+        if len(piece) < 2 or np.array_equal(piece[0], piece[-1]):
+            continue
+        for end in (0, -1):
+            row, col = piece[end]
+            if seams is None or np.isin(np.round(row), seams[0]) or np.isin(np.round(col), seams[1]):
+                ends.append((index, piece[end]))
+    if not ends:
+        return (list(pieces), [[index] for index in range(len(pieces))]) if groups else list(pieces)
+    tree = cKDTree([point for _, point in ends])
+    used = np.zeros(len(pieces), dtype=bool)
+
+    def take_neighbour(point, current):
+        # Nearest first, so corners where several pieces meet join the same way whatever else is in the tree
+        candidates = tree.query_ball_point(point, tolerance)
+        for candidate in sorted(candidates, key=lambda candidate: (np.hypot(*(ends[candidate][1] - point)), candidate)):
+            other = ends[candidate][0]
+            if other != current and not used[other]:
+                return other
+        return None
+
+    stitched, members = [], []
+    for index, piece in enumerate(pieces):
+        if used[index]:
+            continue
+        used[index] = True
+        chain, chain_members = [piece], [index]
+        # Grow the chain forwards from its tail, then backwards from its head
+        for forward in (True, False):
+            while True:
+                end_point = chain[-1][-1] if forward else chain[0][0]
+                neighbour = take_neighbour(end_point, index)
+                if neighbour is None:
+                    break
+                used[neighbour] = True
+                other = pieces[neighbour]
+                near_start = np.hypot(*(other[0] - end_point)) <= np.hypot(*(other[-1] - end_point))
+                if forward:
+                    other = other if near_start else other[::-1]
+                    chain.append(other[1:] if np.allclose(other[0], end_point) else other)
+                    chain_members.append(neighbour)
+                else:
+                    other = other[::-1] if near_start else other
+                    chain.insert(0, other[:-1] if np.allclose(other[-1], end_point) else other)
+                    chain_members.insert(0, neighbour)
+        stitched.append(np.concatenate(chain) if len(chain) > 1 else piece)
+        members.append(chain_members)
+    return (stitched, members) if groups else stitched
+
+def png_to_polylines_tiled(png_path, epsilon=1.0, tile_size=1024, halo=DEFAULT_TILE_HALO, workers=None,
+                           profiler=None, method='graph', simplify='douglas-peucker', as_store=False,
+                           processes=False, dedup_tolerance=None):
+    """
+    Convert a large image to polylines tile by tile. Each tile is blurred,
+    edge-detected and thinned within a halo window, so intermediate images never
+    exceed (tile_size + 2*halo)^2 per worker. Polylines are traced in the tile
+    cores and stitched across tile borders before simplification. Tiles run on
+    a thread pool, since the OpenCV stages release the GIL. With processes=True
+    they run on a process pool instead, so the tracing runs in parallel too.
+    The image is then placed in shared memory once, and workers read their
+    windows in place. simplify, as_store and dedup_tolerance work as in
+    png_to_polylines.
+    """
+    profiler = profiler or NULL_PROFILER
+    with profiler.stage('read_png') as record:
+        image = open_image(png_path)
+        record['items'] = image.size
+    if not test_ximgproc(verbose=False):
+        raise ImportError("ximgproc module is required for edge thinning.")
+
+    with profiler.stage('tiles') as record:
+        tiles = list(tile_windows(image.shape, tile_size, halo))
+        if processes and len(tiles) > 1:
+            with SharedArena() as arena, \
+                    ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(tiles))) as executor:
+                handle = arena.share(image)
+                futures = [executor.submit(call_with_shared, _process_tile, handle, core, window, method)
+                           for core, window in tiles]
+                results = [future.result() for future in futures]
+        else:
+            with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+                results = list(executor.map(lambda tile: _process_tile(image, *tile, method), tiles))
+        pieces = [piece for tile_pieces, _ in results for piece in tile_pieces]
+        record['items'] = len(tiles)
+    with profiler.stage('stitch') as record:
+        # Skeleton strokes crossing a seam can end on neighbouring rather than
+        # identical pixels in the two tiles, so graph pieces are joined within a pixel
+        seams = (np.arange(tile_size, image.shape[0], tile_size), np.arange(tile_size, image.shape[1], tile_size))
+        polylines = stitch_polylines(pieces, 1.5 if method == 'graph' else 1e-6, seams) if len(tiles) > 1 else pieces
+        record['items'] = len(polylines)
+    with profiler.stage('simplify', method=simplify) as record:
+        store = simplify_polylines(PolylineStore.from_polylines(polylines), epsilon, simplify)
+        record['items'] = store.num_points
+    with profiler.stage('dedup') as record:
+        if dedup_tolerance is None:
+            dedup_tolerance = tile_dedup_tolerance([widths for _, widths in results], epsilon)
+        store, kept = deduplicate_polylines(store, dedup_tolerance)
+        record['tolerance'] = dedup_tolerance
+        record['items'] = store.num_curves
+        record['removed'] = int(len(kept) - kept.sum())
+    return store if as_store else store.to_polylines()
 
 def save_polylines_to_csv(polylines, csv_path):
-    """Save the polylines to a CSV file in the format expected by the regularization module."""
-    with open(csv_path, 'w') as f:
-        for i, polyline in enumerate(polylines):
-            for j, point in enumerate(polyline):
-                f.write(f"{i},{j},{point[0]},{point[1]}\n")
+    """Export the polylines to a CSV file in the format expected by the regularization module."""
+    PolylineStore.from_polylines(polylines).to_csv(csv_path)
+
+def save_polylines_to_store(polylines, store_path):
+    """Save the polylines in the binary columnar format of polyline_store."""
+    store = PolylineStore.from_polylines(polylines)
+    store.save(store_path)
+    return store
 
 if __name__ == "__main__":
     test_ximgproc()
\ No newline at end of file
@@ -0,0 +1,149 @@
+# File: polyline_store.py
+
+import os
+import numpy as np
+
+STORE_MAGIC = b'CPLSTORE'
+STORE_VERSION = 1
+STORE_EXTENSION = '.cpl'
+
+# The header is padded to a full alignment block and every array section starts
+# on a 64-byte boundary so the file can be memory-mapped without copies.
+_ALIGNMENT = 64
+_HEADER_DTYPE = np.dtype([
+    ('magic', 'S8'),
+    ('version', '<u4'),
+    ('reserved', '<u4'),
+    ('num_paths', '<u8'),
+    ('num_curves', '<u8'),
+    ('num_points', '<u8'),
+])
+_OFFSET_DTYPE = np.dtype('<i8')
+_COORD_DTYPE = np.dtype('<f8')
+
+def _aligned(size):
+    return -(-size // _ALIGNMENT) * _ALIGNMENT
+
+class PolylineStore:
+    """
+    Columnar storage for paths of curves: one flat (N, 2) coordinate array,
+    curve offsets into the coordinates and path offsets into the curves.
+    """
+    __slots__ = ('coords', 'curve_offsets', 'path_offsets')
+
+    def __init__(self, coords, curve_offsets, path_offsets):
+        self.coords = coords
+        self.curve_offsets = curve_offsets
+        self.path_offsets = path_offsets
+
+    @classmethod
+    def from_polylines(cls, polylines):
+        """Pack polylines so that each polyline becomes a path with a single curve."""
+        return cls.from_paths([[polyline] for polyline in polylines])
+
+    @classmethod
+    def from_paths(cls, paths):
+        """Pack a list of paths, each a list of (N, 2) point arrays."""
+        curves = [np.asarray(curve, dtype=np.float64).reshape(-1, 2) for path in paths for curve in path]
+        coords = np.concatenate(curves) if curves else np.empty((0, 2), dtype=np.float64)
+        curve_offsets = np.zeros(len(curves) + 1, dtype=np.int64)
+        np.cumsum([len(curve) for curve in curves], out=curve_offsets[1:])
+        path_offsets = np.zeros(len(paths) + 1, dtype=np.int64)
+        np.cumsum([len(path) for path in paths], out=path_offsets[1:])
+        return cls(coords, curve_offsets, path_offsets)
+
+    @property
+    def num_paths(self):
+        return len(self.path_offsets) - 1
+
+    @property
+    def num_curves(self):
+        return len(self.curve_offsets) - 1
+
+    @property
+    def num_points(self):
+        return len(self.coords)
+
+    def curve(self, index):
+        """Return the points of a curve as a view into the coordinate array."""
+        return self.coords[self.curve_offsets[index]:self.curve_offsets[index + 1]]
+
+    def path(self, index):
+        """Return the curves of a path as views into the coordinate array."""
+        return [self.curve(j) for j in range(self.path_offsets[index], self.path_offsets[index + 1])]
+
+    def to_paths(self):
+        """Return the nested list-of-arrays layout used by process_paths, without copying points."""
+        bounds = self.curve_offsets.tolist()
+        curves = [self.coords[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+        path_bounds = self.path_offsets.tolist()
+        return [curves[start:end] for start, end in zip(path_bounds[:-1], path_bounds[1:])]
+
+    def to_polylines(self):
+        """Return every curve as a flat list of views, the inverse of from_polylines."""
+        bounds = self.curve_offsets.tolist()
+        return [self.coords[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+    def save(self, store_path):
+        """Write the store in the raw binary layout read by PolylineStore.load."""
+        header = np.zeros(1, dtype=_HEADER_DTYPE)
+        header['magic'] = STORE_MAGIC
+        header['version'] = STORE_VERSION
+        header['num_paths'] = self.num_paths
+        header['num_curves'] = self.num_curves
+        header['num_points'] = self.num_points
+
+        sections = [
+            np.ascontiguousarray(self.path_offsets, dtype=_OFFSET_DTYPE),
+            np.ascontiguousarray(self.curve_offsets, dtype=_OFFSET_DTYPE),
+            np.ascontiguousarray(self.coords, dtype=_COORD_DTYPE),
+        ]
+        with open(store_path, 'wb') as f:
+            f.write(header.tobytes())
+            for section in sections:
+                f.write(b'\0' * (_aligned(f.tell()) - f.tell()))
+                # tofile writes straight from the array buffer
+                section.tofile(f)
+
+    @classmethod
+    def load(cls, store_path, mmap=True):
+        """Read a store written by save; with mmap=True the arrays map the file instead of loading it."""
+        if not os.path.exists(store_path):
+            raise FileNotFoundError(f"Polyline store not found: {store_path}")
+
+        header = np.fromfile(store_path, dtype=_HEADER_DTYPE, count=1)
+        if len(header) == 0 or header['magic'][0] != STORE_MAGIC:
+            raise ValueError(f"Not a polyline store: {store_path}")
+        if header['version'][0] != STORE_VERSION:
+            raise ValueError(f"Unsupported polyline store version {header['version'][0]}: {store_path}")
+
+        num_paths = int(header['num_paths'][0])
+        num_curves = int(header['num_curves'][0])
+        num_points = int(header['num_points'][0])
+        layout = [
+            (_OFFSET_DTYPE, (num_paths + 1,)),
+            (_OFFSET_DTYPE, (num_curves + 1,)),
+            (_COORD_DTYPE, (num_points, 2)),
+        ]
+
+        arrays = []
+        offset = _HEADER_DTYPE.itemsize
+        for dtype, shape in layout:
+            offset = _aligned(offset)
+            count = int(np.prod(shape))
+            if mmap and count > 0:
+                array = np.memmap(store_path, dtype=dtype, mode='r', offset=offset, shape=shape)
+            else:
+                array = np.fromfile(store_path, dtype=dtype, count=count, offset=offset).reshape(shape)
+            arrays.append(array)
+            offset += count * dtype.itemsize
+        path_offsets, curve_offsets, coords = arrays
+        return cls(coords, curve_offsets, path_offsets)
+
+    def to_csv(self, csv_path):
+        """Export as path_id,curve_id,x,y rows, the format read by curve_regularization.read_csv."""
+        curve_ids = np.repeat(np.arange(self.num_curves), np.diff(self.curve_offsets))
+        path_of_curve = np.repeat(np.arange(self.num_paths), np.diff(self.path_offsets))
+        curve_in_path = np.arange(self.num_curves) - self.path_offsets[path_of_curve]
+        rows = np.column_stack([path_of_curve[curve_ids], curve_in_path[curve_ids], self.coords])
+        np.savetxt(csv_path, rows, delimiter=',', fmt=['%d', '%d', '%s', '%s'])
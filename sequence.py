@@ -0,0 +1,352 @@
+# File: sequence.py
+"""
+Frame-sequence mode for scans and whiteboard video, where consecutive frames
+are nearly identical.
+
+Each frame is diffed against the previous one over the halo window of every
+tile, and an unchanged frame returns the previous result. Only tiles whose
+window changed are re-extracted. Their pieces are simplified per tile, except
+those ending near a seam, which are stitched as in png_to_polylines_tiled;
+only the chains reaching a changed tile or its neighbours are re-stitched.
+Deduplication is re-run for the polylines in those tiles, against the kept
+polylines around them, and polylines elsewhere keep their kept or dropped
+state and their classification. Every new curve is matched to the previous
+frame's curves: an identical polyline reuses its classification outright, and
+a nearby curve is first re-checked against its previous shape, with circles
+warm-started from the previous parameters. It is only classified from scratch
+when that check fails.
+
+    python sequence.py frames/*.png --tile-size 256
+"""
+
+import os
+import sys
+import glob
+import time
+import argparse
+import hashlib
+import numpy as np
+import cv2
+from concurrent.futures import ThreadPoolExecutor
+from scipy.spatial import cKDTree
+
+from png_processor import (open_image, tile_windows, _process_tile, stitch_polylines, simplify_polylines,
+                           deduplicate_polylines, tile_dedup_tolerance, test_ximgproc, DEFAULT_TILE_HALO)
+from polyline_store import PolylineStore
+from curve_model import Curve
+from curve_regularization import (classify_curve, fit_circle, circle_distances, match_line, match_ellipse,
+                                  match_rectangle)
+
+def _changed_windows(previous, image, windows, diff_threshold=0):
+    """Whether any pixel in each (row0, row1, col0, col1) window differs by more than diff_threshold."""
+    changed = cv2.absdiff(np.asarray(previous), np.asarray(image)) > diff_threshold
+    return [bool(changed[r0:r1, c0:c1].any()) for r0, r1, c0, c1 in windows]
+
+def _curve_key(points):
+    return hashlib.sha1(np.ascontiguousarray(points, dtype=np.float64).tobytes()).hexdigest()
+
+def _near_seam(piece, seams, margin):
+    """Whether an end of an open piece lies within margin of a seam row or column, so stitching may join it."""
+    if len(piece) < 2 or np.array_equal(piece[0], piece[-1]):
+        return False
+    ends = np.asarray(piece)[[0, -1]]
+    return any(len(seams[axis]) and np.abs(ends[:, axis, None] - seams[axis]).min() <= margin for axis in (0, 1))
+
+def _entry(points, tiles, members=()):
+    """A polyline of the frame with the tiles it was traced in and its cached dedup and classification results."""
+    return {'points': points, 'tiles': frozenset(tiles), 'members': list(members), 'kept': True,
+            'bounds': (points.min(axis=0), points.max(axis=0)), 'curve': None, 'key': None, 'summary': None}
+
+def _summary(points):
+    """
+    Centroid and arc length of a polyline, used to match curves across frames.
+    The centroid is weighted by segment length, so it does not move with the
+    vertices that simplification happens to keep.
+    """
+    if len(points) < 2:
+        return points.mean(axis=0), 0.0
+    lengths = np.hypot(*np.diff(points, axis=0).T)
+    if lengths.sum() == 0:
+        return points.mean(axis=0), 0.0
+    midpoints = (points[1:] + points[:-1]) / 2
+    return lengths @ midpoints / lengths.sum(), lengths.sum()
+
+def refit_curve(points, previous, threshold=0.1):
+    """
+    Re-check points against the shape of the matched previous curve. Circles
+    warm-start the geometric refinement from the previous parameters. Returns
+    the new Curve, or None when the previous shape no longer fits.
+    """
+    if previous['type'] == 'circle' and len(points) >= 3:
+        circle_params = fit_circle(points, refine=True, initial=previous['params'])
+        if np.max(circle_distances(points, circle_params)) < threshold:
+            return Curve('circle', circle_params, points)
+        return None
+    matchers = {'line': match_line, 'ellipse': match_ellipse, 'rectangle': match_rectangle}
+    if previous['type'] in matchers:
+        params = matchers[previous['type']](points, threshold)
+        return Curve(previous['type'], params, points) if params is not None else None
+    return None
+
+class FrameSequence:
+    """
+    Incremental pipeline state for a sequence of frames of one scene. Call
+    process(frame) for each frame in order, with a path or a 2D uint8 array.
+    Each call returns a dict with the simplified PolylineStore, the
+    regularized paths in the layout of process_paths, and counts of changed
+    tiles, of duplicate polylines dropped, and of reused, warm-started and
+    newly classified curves. dedup_tolerance works as in png_to_polylines.
+    """
+
+    def __init__(self, tile_size=256, halo=DEFAULT_TILE_HALO, epsilon=1.0, method='graph',
+                 simplify='douglas-peucker', threshold=0.1, diff_threshold=0, match_distance=2.0,
+                 match_length=0.1, workers=None, dedup_tolerance=None):
+        self.tile_size = tile_size
+        self.halo = halo
+        self.epsilon = epsilon
+        self.method = method
+        self.simplify = simplify
+        self.threshold = threshold
+        self.diff_threshold = diff_threshold
+        self.match_distance = match_distance
+        self.match_length = match_length
+        self.workers = workers or os.cpu_count() or 1
+        self.dedup_tolerance = dedup_tolerance
+        self.reset()
+
+    def reset(self):
+        """Forget the previous frame, so the next one is processed from scratch."""
+        self.image = None
+        self.result = None
+        self.tiles = []
+        self.grid = []
+        self.seams = ([], [])
+        self.tile_widths = []
+        self.tile_tolerance = None
+        self.tile_interior = []
+        self.tile_seam = []
+        self.chains = []
+        self.curves = {}
+        self.curve_tree = None
+        self.curve_summaries = []
+        self.curve_list = []
+
+    def _simplify(self, polylines):
+        if not polylines:
+            return []
+        return simplify_polylines(PolylineStore.from_polylines(polylines), self.epsilon, self.simplify).to_polylines()
+
+    def _extract(self, image):
+        """
+        Trace pieces in the changed tiles only and re-stitch the seams around
+        them. Returns the indices of the changed tiles.
+        """
+        if self.image is None or self.image.shape != image.shape:
+            self.tiles = list(tile_windows(image.shape, self.tile_size, self.halo))
+            self.grid = [(core[0] // self.tile_size, core[2] // self.tile_size) for core, _ in self.tiles]
+            self.seams = (np.arange(self.tile_size, image.shape[0], self.tile_size),
+                          np.arange(self.tile_size, image.shape[1], self.tile_size))
+            self.tile_widths = [None] * len(self.tiles)
+            self.tile_interior = [[] for _ in self.tiles]
+            self.tile_seam = [[] for _ in self.tiles]
+            self.chains = []
+            changed = [True] * len(self.tiles)
+        elif np.array_equal(self.image, image):
+            return []
+        else:
+            changed = _changed_windows(self.image, image, [window for _, window in self.tiles], self.diff_threshold)
+        # Keep a copy, since capture loops often reuse one buffer for every frame
+        self.image = image.copy()
+        todo = [i for i, flag in enumerate(changed) if flag]
+        if not todo:
+            return todo
+
+        # Pieces that cannot reach a seam are complete polylines, so they are
+        # simplified once per tile; the others wait for stitching
+        margin = self._stitch_tolerance() + 0.5
+        interior = {}
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(todo))) as executor:
+            for i, (pieces, widths) in zip(todo, executor.map(
+                    lambda i: _process_tile(image, *self.tiles[i], self.method), todo)):
+                self.tile_widths[i] = widths
+                near = [_near_seam(piece, self.seams, margin) for piece in pieces]
+                self.tile_seam[i] = [piece for piece, flag in zip(pieces, near) if flag]
+                interior[i] = [piece for piece, flag in zip(pieces, near) if not flag]
+        simplified = self._simplify([piece for i in todo for piece in interior[i]])
+        offset = 0
+        for i in todo:
+            self.tile_interior[i] = [_entry(points, (i,)) for points in simplified[offset:offset + len(interior[i])]]
+            offset += len(interior[i])
+        self._stitch(set(todo))
+        return todo
+
+    def _stitch_tolerance(self):
+        # Graph pieces crossing a seam can end on neighbouring pixels, as in png_to_polylines_tiled
+        return 1.5 if self.method == 'graph' else 1e-6
+
+    def _neighbourhood(self, tiles):
+        """The given tiles and the tiles around them."""
+        return {i for i, (row, col) in enumerate(self.grid)
+                if any(abs(row - self.grid[j][0]) <= 1 and abs(col - self.grid[j][1]) <= 1 for j in tiles)}
+
+    def _stitch(self, changed):
+        """
+        Re-stitch the chains that reach a changed tile or its neighbours, with
+        the new seam pieces of the changed tiles. Chains elsewhere are kept
+        with their simplified polyline and cached results.
+        """
+        near = self._neighbourhood(changed)
+        chains, members = [], set()
+        for chain in self.chains:
+            if chain['tiles'] & near:
+                members.update(member for member in chain['members'] if member[0] not in changed)
+            else:
+                chains.append(chain)
+        members.update((i, j) for i in changed for j in range(len(self.tile_seam[i])))
+        members = sorted(members)
+        pieces = [self.tile_seam[i][j] for i, j in members]
+        polylines, groups = stitch_polylines(pieces, self._stitch_tolerance(), self.seams, groups=True)
+        for points, group in zip(self._simplify(polylines), groups):
+            chain_members = [members[k] for k in group]
+            chains.append(_entry(points, [i for i, _ in chain_members], chain_members))
+        self.chains = chains
+
+    def _deduplicate(self, entries, local, tolerance):
+        """
+        Re-run deduplication for the local polylines, against the kept
+        polylines around them. The others keep their kept or dropped state.
+        """
+        if local:
+            low = np.min([entry['bounds'][0] for entry in local], axis=0) - tolerance
+            high = np.max([entry['bounds'][1] for entry in local], axis=0) + tolerance
+        local_ids = {id(entry) for entry in local}
+        # In frame order, so polylines of equal length are ranked as in a full run
+        group = [entry for entry in entries if id(entry) in local_ids or (
+            local and entry['kept'] and np.all(entry['bounds'][0] <= high) and np.all(entry['bounds'][1] >= low))]
+        removable = np.array([id(entry) in local_ids for entry in group], dtype=bool)
+        _, kept = deduplicate_polylines(PolylineStore.from_polylines([entry['points'] for entry in group]),
+                                        tolerance, removable)
+        for entry, flag, local_entry in zip(group, kept, removable):
+            if local_entry:
+                entry['kept'] = bool(flag)
+        self.tile_tolerance = tolerance
+
+    def _match(self, points):
+        """The previous curve of similar length with the nearest centroid within match_distance, or None."""
+        if self.curve_tree is None:
+            return None
+        centroid, length = _summary(points)
+        candidates = self.curve_tree.query_ball_point(centroid, self.match_distance)
+        distances = np.hypot(*(self.curve_tree.data[candidates] - centroid).T) if candidates else []
+        for index in np.asarray(candidates, dtype=np.int64)[np.argsort(distances, kind='stable')]:
+            previous_length = self.curve_summaries[index][1]
+            if abs(previous_length - length) <= self.match_length * max(previous_length, 1.0):
+                return self.curve_list[index]
+        return None
+
+    def _regularize(self, entries):
+        """
+        Classify the kept polylines. Entries carried over from the previous
+        frame keep their curve; new ones are looked up by hash, then matched.
+        """
+        counts = {'reused': 0, 'warm_started': 0, 'classified': 0}
+        for entry in entries:
+            if entry['curve'] is not None:
+                counts['reused'] += 1
+                continue
+            points = entry['points']
+            key = _curve_key(points)
+            previous = self.curves.get(key)
+            if previous is not None:
+                curve = Curve(previous['type'], previous['params'], points)
+                counts['reused'] += 1
+            else:
+                previous = self._match(points)
+                curve = refit_curve(points, previous, self.threshold) if previous is not None else None
+                if curve is not None:
+                    counts['warm_started'] += 1
+                else:
+                    curve = classify_curve(points, threshold=self.threshold)[0]
+                    counts['classified'] += 1
+            entry.update(curve=curve, key=key, summary=_summary(points))
+
+        # Index this frame's curves for the next one
+        self.curves = {entry['key']: entry['curve'] for entry in entries}
+        self.curve_list = [entry['curve'] for entry in entries]
+        self.curve_summaries = [entry['summary'] for entry in entries]
+        self.curve_tree = cKDTree([centroid for centroid, _ in self.curve_summaries]) if entries else None
+        return [[curve] for curve in self.curve_list], counts
+
+    def process(self, frame):
+        """Process the next frame and return its polylines, regularized paths and reuse counts."""
+        start = time.perf_counter()
+        image = open_image(frame) if isinstance(frame, str) else np.asarray(frame)
+        if image.ndim != 2 or image.dtype != np.uint8:
+            raise ValueError("Frames must be 2D uint8 grayscale images")
+        changed = self._extract(image)
+        if not changed and self.result is not None:
+            # Nothing to redo: the previous result stands, with every curve reused
+            return dict(self.result, changed_tiles=0, seconds=time.perf_counter() - start,
+                        reused=len(self.curve_list), warm_started=0, classified=0)
+        entries = [entry for tile in self.tile_interior for entry in tile] + self.chains
+        tolerance = self.dedup_tolerance
+        if tolerance is None:
+            tolerance = tile_dedup_tolerance(self.tile_widths, self.epsilon)
+        if tolerance == self.tile_tolerance:
+            near = self._neighbourhood(changed)
+            local = [entry for entry in entries if entry['tiles'] & near]
+        else:
+            local = entries
+        self._deduplicate(entries, local, tolerance)
+        kept = [entry for entry in entries if entry['kept']]
+        regularized_paths, counts = self._regularize(kept)
+        self.result = {
+            'store': PolylineStore.from_polylines([entry['points'] for entry in kept]),
+            'regularized_paths': regularized_paths,
+            'changed_tiles': len(changed),
+            'total_tiles': len(self.tiles),
+            'duplicates': len(entries) - len(kept),
+            'seconds': time.perf_counter() - start,
+            **counts,
+        }
+        return self.result
+
+def process_sequence(frames, **options):
+    """Yield the FrameSequence result of each frame in order; options are FrameSequence arguments."""
+    sequence = FrameSequence(**options)
+    for frame in frames:
+        yield sequence.process(frame)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('frames', nargs='+', help="Frame images in order, or glob patterns expanded in sorted order")
+    parser.add_argument('--tile-size', type=int, default=256, help="Tile size in pixels for change detection")
+    parser.add_argument('--tracer', choices=['graph', 'contours'], default='graph')
+    parser.add_argument('--epsilon', type=float, default=1.0, help="Polyline simplification tolerance in pixels")
+    parser.add_argument('--threshold', type=float, default=0.1, help="Maximum residual for a shape fit to match")
+    parser.add_argument('--diff-threshold', type=int, default=0,
+                        help="Ignore pixel changes up to this intensity difference, e.g. sensor noise")
+    parser.add_argument('--dedup-tolerance', type=float, default=None,
+                        help="Drop polylines within this Hausdorff distance in pixels of a longer one "
+                             "(default: from the stroke width, 0 disables)")
+    parser.add_argument('-w', '--workers', type=int, default=None, help="Threads for re-extracting changed tiles")
+    args = parser.parse_args(argv)
+
+    if not test_ximgproc(verbose=False):
+        print("ximgproc is not available. The program may not function correctly.")
+        return 1
+    frames = []
+    for pattern in args.frames:
+        frames.extend(sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern])
+    results = process_sequence(frames, tile_size=args.tile_size, method=args.tracer, epsilon=args.epsilon,
+                               threshold=args.threshold, diff_threshold=args.diff_threshold, workers=args.workers,
+                               dedup_tolerance=args.dedup_tolerance)
+    for frame, result in zip(frames, results):
+        print(f"{frame}: {result['changed_tiles']}/{result['total_tiles']} tiles changed, "
+              f"{result['store'].num_curves} curves ({result['duplicates']} duplicates dropped, "
+              f"{result['reused']} reused, {result['warm_started']} warm-started, {result['classified']} classified) "
+              f"in {result['seconds']:.3f} s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
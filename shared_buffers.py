@@ -0,0 +1,152 @@
+# File: shared_buffers.py
+"""
+Zero-copy transport of images and polyline buffers between processes.
+
+The owning process copies each array once into a multiprocessing.shared_memory
+segment and sends workers only small picklable handles. Workers map the segment and
+read their slice in place:
+
+    with SharedArena() as arena:
+        handle = arena.share(image)
+        future = executor.submit(call_with_shared, work, handle, ...)
+
+where work receives the image array in place of the handle.
+
+Only the owner unlinks segments. It does so when the arena closes, in a
+finally block, so segments are released even when a worker crashes or a task
+raises. Should the owner itself die, the multiprocessing resource tracker
+unlinks the segments it registered at creation and warns about the leak.
+
+Resource tracker caveat: before Python 3.13, attaching to a segment also
+registers it with the resource tracker. Workers started by multiprocessing
+share the owner's tracker, so this is harmless there. An unrelated process
+that attaches would have its own tracker unlink the segment when it exits.
+From Python 3.13 workers attach with track=False.
+"""
+
+import sys
+from multiprocessing import shared_memory
+import numpy as np
+from polyline_store import PolylineStore
+
+_ATTACH_OPTIONS = {'track': False} if sys.version_info >= (3, 13) else {}
+
+class SharedArrayHandle:
+    """Picklable reference to an array in a shared memory segment."""
+    __slots__ = ('name', 'shape', 'dtype')
+
+    def __init__(self, name, shape, dtype):
+        self.name = name
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype).str
+
+    def __getstate__(self):
+        return (self.name, self.shape, self.dtype)
+
+    def __setstate__(self, state):
+        self.name, self.shape, self.dtype = state
+
+    def __repr__(self):
+        return f"SharedArrayHandle({self.name!r}, {self.shape}, {self.dtype!r})"
+
+class SharedStoreHandle:
+    """Handles of the coordinate and offset arrays of a PolylineStore."""
+    __slots__ = ('coords', 'curve_offsets', 'path_offsets')
+
+    def __init__(self, coords, curve_offsets, path_offsets):
+        self.coords = coords
+        self.curve_offsets = curve_offsets
+        self.path_offsets = path_offsets
+
+    def __getstate__(self):
+        return (self.coords, self.curve_offsets, self.path_offsets)
+
+    def __setstate__(self, state):
+        self.coords, self.curve_offsets, self.path_offsets = state
+
+class SharedArena:
+    """
+    Owner of a set of shared memory segments. Use it as a context manager. On
+    exit every segment is closed and unlinked, whether or not the block raised.
+    """
+
+    def __init__(self):
+        self.segments = []
+
+    def share(self, array):
+        """Copy an array into a new segment and return its handle."""
+        array = np.ascontiguousarray(array)
+        # Zero-size segments are not allowed, so empty arrays still get one byte
+        segment = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        self.segments.append(segment)
+        view = np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)
+        view[...] = array
+        del view
+        return SharedArrayHandle(segment.name, array.shape, array.dtype)
+
+    def share_store(self, store):
+        """Share the three arrays of a PolylineStore."""
+        return SharedStoreHandle(self.share(store.coords), self.share(store.curve_offsets),
+                                 self.share(store.path_offsets))
+
+    def close(self):
+        segments, self.segments = self.segments, []
+        for segment in segments:
+            try:
+                segment.close()
+            except BufferError:
+                # A view in this process still exports the buffer; unlinking below still frees the name
+                pass
+            try:
+                segment.unlink()
+            except FileNotFoundError:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+# Segments whose mapping was still referenced when a call ended, e.g. from the
+# frames of a propagating exception. They are closed on a later call.
+_deferred = []
+
+def _close_segments(segments):
+    for segment in segments:
+        try:
+            segment.close()
+        except BufferError:
+            _deferred.append(segment)
+
+def _resolve(value, segments):
+    if isinstance(value, SharedArrayHandle):
+        segment = shared_memory.SharedMemory(name=value.name, **_ATTACH_OPTIONS)
+        segments.append(segment)
+        array = np.ndarray(value.shape, dtype=np.dtype(value.dtype), buffer=segment.buf)
+        array.flags.writeable = False
+        return array
+    if isinstance(value, SharedStoreHandle):
+        return PolylineStore(_resolve(value.coords, segments), _resolve(value.curve_offsets, segments),
+                             _resolve(value.path_offsets, segments))
+    return value
+
+def call_with_shared(function, *args, **kwargs):
+    """
+    Call function with every handle argument replaced by a read-only array,
+    or a PolylineStore, mapped from its segment without copying. The mappings
+    are closed when the call returns, so function must not return views of
+    them. Module-level functions stay picklable, so pool tasks can be
+    submitted as executor.submit(call_with_shared, function, handle, ...).
+    """
+    pending, _deferred[:] = list(_deferred), []
+    _close_segments(pending)
+    segments = []
+    try:
+        args = [_resolve(value, segments) for value in args]
+        kwargs = {key: _resolve(value, segments) for key, value in kwargs.items()}
+        return function(*args, **kwargs)
+    finally:
+        del args, kwargs
+        _close_segments(segments)
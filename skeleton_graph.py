@@ -0,0 +1,111 @@
+# File: skeleton_graph.py
+
+import numpy as np
+import cv2
+
+# 8-neighbourhood offsets as (row, col), 4-connected ones first
+NEIGHBOUR_OFFSETS = ((-1, 0), (0, -1), (0, 1), (1, 0), (-1, -1), (-1, 1), (1, -1), (1, 1))
+
+def skeleton_neighbours(skeleton):
+    """
+    Build the pixel graph of a one-pixel-wide skeleton. Returns the (N, 2)
+    (row, col) coordinates of the skeleton pixels and an (N, 8) table of
+    neighbour indices (-1 where there is none). A diagonal link is dropped when
+    the two pixels already meet through a shared 4-neighbour, so staircase
+    corners left by thinning do not show up as junctions.
+    """
+    mask = np.asarray(skeleton) > 0
+    rows, cols = np.nonzero(mask)
+    index = np.full((mask.shape[0] + 2, mask.shape[1] + 2), -1, dtype=np.int64)
+    index[rows + 1, cols + 1] = np.arange(len(rows))
+    neighbours = np.empty((len(rows), len(NEIGHBOUR_OFFSETS)), dtype=np.int64)
+    for k, (dr, dc) in enumerate(NEIGHBOUR_OFFSETS):
+        neighbours[:, k] = index[rows + 1 + dr, cols + 1 + dc]
+        if dr and dc:
+            redundant = (index[rows + 1 + dr, cols + 1] >= 0) | (index[rows + 1, cols + 1 + dc] >= 0)
+            neighbours[redundant, k] = -1
+    return np.column_stack([rows, cols]).astype(np.float64), neighbours
+
+def trace_skeleton(skeleton):
+    """
+    Trace a skeleton into strokes, each emitted once as an ordered (row, col)
+    polyline. Strokes run between junction pixels (degree > 2) and endpoints
+    (degree 1); loops without any such pixel are closed polylines. Runs in time
+    linear in the number of skeleton pixels.
+
+    Returns (polylines, topology) where topology has 'nodes' (K, 2) coordinates
+    with 'node_types' ('junction' or 'endpoint'), and 'edges' giving the
+    (start, end) node indices of every polyline, (None, None) for closed loops.
+    Adjacent junction pixels are merged into one node at their centroid.
+    """
+    coords, neighbours = skeleton_neighbours(skeleton)
+    degrees = (neighbours >= 0).sum(axis=1)
+    adjacency = [[n for n in row if n >= 0] for row in neighbours.tolist()]
+
+    # Group touching junction pixels so each junction is a single node
+    junction_mask = np.zeros(np.shape(skeleton), dtype=np.uint8)
+    is_junction = degrees > 2
+    junction_pixels = coords[is_junction].astype(np.int64)
+    junction_mask[junction_pixels[:, 0], junction_pixels[:, 1]] = 1
+    num_labels, labels = cv2.connectedComponents(junction_mask, connectivity=8)
+    junction_ids = labels[junction_pixels[:, 0], junction_pixels[:, 1]] - 1
+    node_of_pixel = np.full(len(coords), -1, dtype=np.int64)
+    node_of_pixel[is_junction] = junction_ids
+    num_junctions = num_labels - 1
+    endpoints = np.flatnonzero(degrees == 1)
+    node_of_pixel[endpoints] = num_junctions + np.arange(len(endpoints))
+    junction_centroids = np.zeros((num_junctions, 2))
+    if num_junctions:
+        counts = np.bincount(junction_ids, minlength=num_junctions)[:, None]
+        for axis in range(2):
+            junction_centroids[:, axis] = np.bincount(junction_ids, coords[is_junction, axis], num_junctions)
+        junction_centroids /= counts
+    is_node = (degrees != 2).tolist()
+    node_of_pixel = node_of_pixel.tolist()
+
+    visited = [False] * len(coords)
+    chains, edges = [], []
+    for start in np.flatnonzero(degrees != 2).tolist():
+        for first in adjacency[start]:
+            if is_node[first]:
+                # Steps inside a junction cluster are not strokes; a direct link
+                # from a junction or endpoint to an endpoint is, and is taken once
+                if degrees[first] == 1 and (degrees[start] > 1 or start < first):
+                    chains.append([start, first])
+                    edges.append((node_of_pixel[start], node_of_pixel[first]))
+                continue
+            if visited[first]:
+                continue
+            chain = [start, first]
+            previous, current = start, first
+            while not is_node[current]:
+                visited[current] = True
+                a, b = adjacency[current]
+                previous, current = current, (b if a == previous else a)
+                chain.append(current)
+            chains.append(chain)
+            edges.append((node_of_pixel[start], node_of_pixel[current]))
+
+    # Whatever is left of the degree-2 pixels forms closed loops
+    for start in np.flatnonzero(degrees == 2).tolist():
+        if visited[start]:
+            continue
+        visited[start] = True
+        chain = [start]
+        previous, current = start, adjacency[start][0]
+        while current != start:
+            visited[current] = True
+            chain.append(current)
+            a, b = adjacency[current]
+            previous, current = current, (b if a == previous else a)
+        chain.append(start)
+        chains.append(chain)
+        edges.append((None, None))
+
+    polylines = [coords[chain] for chain in chains]
+    topology = {
+        'nodes': np.vstack([junction_centroids, coords[endpoints]]),
+        'node_types': ['junction'] * num_junctions + ['endpoint'] * len(endpoints),
+        'edges': edges,
+    }
+    return polylines, topology
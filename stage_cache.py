@@ -0,0 +1,122 @@
+# File: stage_cache.py
+
+import os
+import json
+import pickle
+import hashlib
+import tempfile
+
+CACHE_SUFFIX = '.pkl'
+DEFAULT_CACHE_BYTES = 1 << 30
+# Bump whenever a stage's output or a pickled class changes, so entries
+# written by older code are never served
+CACHE_VERSION = 2
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 hex digest of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class StageCache:
+    """
+    On-disk, content-addressed cache of pipeline stage outputs.
+
+    A stage key hashes the stage name, the key of its input and the stage
+    parameters, so keys chain from the image digest through every stage and a
+    change in one stage's parameters only invalidates that stage and the ones
+    after it. Keys also include CACHE_VERSION. Entries are pickles written
+    atomically, so several processes can share a cache directory. Reads
+    refresh an entry's mtime, and writes evict the least recently used
+    entries once the directory exceeds max_bytes.
+    """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.stats = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0, 'stages': {}}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(stage, input_key, **params):
+        """Key for a stage applied to the input identified by input_key with the given parameters."""
+        payload = json.dumps({'version': CACHE_VERSION, 'stage': stage, 'input': input_key, 'params': params},
+                             sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _path(self, stage, key):
+        return os.path.join(self.cache_dir, f"{stage}-{key}{CACHE_SUFFIX}")
+
+    def _count(self, stage, outcome):
+        self.stats[outcome] += 1
+        counts = self.stats['stages'].setdefault(stage, {'hits': 0, 'misses': 0})
+        counts[outcome] += 1
+
+    def get(self, stage, key):
+        """Return (True, value) on a hit and (False, None) on a miss."""
+        path = self._path(stage, key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+            os.utime(path)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            # Missing, evicted or truncated by another process while we read it, or
+            # pickled with classes or modules this version no longer has
+            self._count(stage, 'misses')
+            return False, None
+        self._count(stage, 'hits')
+        return True, value
+
+    def put(self, stage, key, value):
+        """Store a stage output, then evict old entries if the cache is over its size cap."""
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self._path(stage, key))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self.stats['writes'] += 1
+        self.evict()
+
+    def entries(self):
+        """(mtime, size, path) of every entry, oldest first."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(CACHE_SUFFIX):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return sorted(entries)
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                self.stats['evictions'] += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        for _, _, path in self.entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
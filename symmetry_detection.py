@@ -1,60 +1,174 @@
 # File: symmetry_detection.py
 
 import numpy as np
-from scipy.spatial.distance import cdist
+from scipy.spatial import cKDTree
+from curve_model import Symmetry
 
-def find_reflection_symmetry(points, threshold=0.1):
+def _reflection_scores(tree, centered_points, angles):
+    """
+    Mean nearest-neighbour distance between the points and their mirror image
+    for each candidate angle. The angle parameterizes the reflection used by
+    the original search: rotate by the angle, then flip the x coordinate.
+    """
+    angles = np.atleast_1d(angles)
+    axes = np.column_stack([np.sin(angles), np.cos(angles)])
+    projections = centered_points @ axes.T
+    reflected = 2 * projections.T[:, :, None] * axes[:, None, :] - centered_points[None, :, :]
+    distances, _ = tree.query(reflected.reshape(-1, 2))
+    return distances.reshape(len(angles), -1).mean(axis=1)
+
+def _principal_axis_angles(centered_points):
+    """Angles whose reflection axes are the principal axes of the point covariance."""
+    covariance = centered_points.T @ centered_points / max(len(centered_points), 1)
+    _, eigenvectors = np.linalg.eigh(covariance)
+    return np.mod(np.arctan2(eigenvectors[0], eigenvectors[1]), np.pi)
+
+def _scan_angle(tree, centered_points, angle, score, window, resolution, threshold, num_samples=11):
+    """
+    Scan num_samples angles across angle +- window, keeping the best, and
+    shrink the window to the sample spacing until it is below resolution or
+    the score is below threshold. Turning the axis by window moves each
+    mirrored point by at most 2*radius*window, so the scan also stops once
+    even that cannot bring the mean score below threshold.
+    """
+    mean_radius = np.mean(np.hypot(*centered_points.T))
+    while window > resolution and threshold <= score < threshold + 2 * mean_radius * window:
+        angles = angle + np.linspace(-window, window, num_samples)
+        scores = _reflection_scores(tree, centered_points, angles)
+        if np.min(scores) < score:
+            angle, score = angles[np.argmin(scores)], np.min(scores)
+        window = 2 * window / (num_samples - 1)
+    return angle, score
+
+def find_reflection_symmetry(points, threshold=0.1, angular_resolution=np.pi/180, num_refined=3,
+                             fine_resolution=1e-6):
     """
     Find reflection symmetry in a set of points.
     Returns the symmetry line parameters (a, b, c) where ax + by + c = 0.
+    Candidate axes come from the principal axes of the points and a coarse
+    angular grid. The best num_refined candidates are then refined
+    coarse-to-fine down to angular_resolution radians. If the best is still
+    above threshold, it is finished with a dense local scan down to
+    fine_resolution, since the mirror of a large or sparsely sampled curve
+    only lands on it within a small fraction of a degree. Mirror matching
+    uses a KD-tree, so each candidate costs O(N log N).
     """
+    points = np.asarray(points, dtype=np.float64)
     center = np.mean(points, axis=0)
     centered_points = points - center
+    tree = cKDTree(centered_points)
 
-    best_symmetry = None
-    best_score = float('inf')
+    coarse_step = max(angular_resolution, np.pi / 36)
+    candidates = np.concatenate([np.arange(0, np.pi, coarse_step), _principal_axis_angles(centered_points)])
+    scores = _reflection_scores(tree, centered_points, candidates)
 
-    for angle in np.linspace(0, np.pi, 180):
-        cos_theta, sin_theta = np.cos(angle), np.sin(angle)
-        rotation_matrix = np.array([[cos_theta, -sin_theta], [sin_theta, cos_theta]])
-        
-        rotated_points = np.dot(centered_points, rotation_matrix.T)
-        flipped_points = rotated_points * [-1, 1]
-        
-        distances = cdist(rotated_points, flipped_points)
-        min_distances = np.min(distances, axis=1)
-        
-        score = np.mean(min_distances)
-        
+    best_angle, best_score = candidates[np.argmin(scores)], np.min(scores)
+    for index in np.argsort(scores)[:num_refined]:
+        angle, score, step = candidates[index], scores[index], coarse_step
+        while step > angular_resolution:
+            step = max(step / 2, angular_resolution)
+            neighbours = np.array([angle - step, angle + step])
+            neighbour_scores = _reflection_scores(tree, centered_points, neighbours)
+            if np.min(neighbour_scores) < score:
+                angle, score = neighbours[np.argmin(neighbour_scores)], np.min(neighbour_scores)
         if score < best_score:
-            best_score = score
-            best_symmetry = (sin_theta, -cos_theta, -sin_theta*center[0] + cos_theta*center[1])
+            best_angle, best_score = angle, score
+    best_angle, best_score = _scan_angle(tree, centered_points, best_angle, best_score, angular_resolution,
+                                         fine_resolution, threshold)
+
+    if best_score >= threshold:
+        return None
+    # The axis runs along (sin, cos) of the angle through the centre, so its normal is (cos, -sin)
+    sin_theta, cos_theta = np.sin(best_angle), np.cos(best_angle)
+    return (cos_theta, -sin_theta, -cos_theta*center[0] + sin_theta*center[1])
 
-    return best_symmetry if best_score < threshold else None
+def _rotation_score(tree, centered_points, order):
+    """Mean nearest-neighbour distance between the points and their copy rotated by 2*pi/order."""
+    angle = 2 * np.pi / order
+    rotation_matrix = np.array([
+        [np.cos(angle), -np.sin(angle)],
+        [np.sin(angle), np.cos(angle)]
+    ])
+    distances, _ = tree.query(centered_points @ rotation_matrix.T)
+    return np.mean(distances)
 
-def find_rotational_symmetry(points, threshold=0.1, max_order=8):
+def _angular_signature(centered_points, num_bins):
+    """
+    Radius-weighted angular mass of the curve around its centroid, sampled by
+    arc length so the signature does not depend on point density.
+    """
+    segment_lengths = np.hypot(*np.diff(centered_points, axis=0).T)
+    arc_length = np.concatenate([[0], np.cumsum(segment_lengths)])
+    if arc_length[-1] <= 0:
+        return None
+    samples = np.linspace(0, arc_length[-1], max(4 * num_bins, len(centered_points)))
+    x = np.interp(samples, arc_length, centered_points[:, 0])
+    y = np.interp(samples, arc_length, centered_points[:, 1])
+    bins = ((np.arctan2(y, x) + np.pi) / (2 * np.pi) * num_bins).astype(np.int64) % num_bins
+    return np.bincount(bins, weights=np.hypot(x, y), minlength=num_bins)
+
+def rotational_order_spectrum(points, max_order=8):
+    """
+    Score every order from 2 to max_order by the share of the angular
+    signature's AC energy that falls on multiples of that order. A curve with
+    k-fold symmetry has all its energy on multiples of k. Returns an array of
+    scores indexed by order (entries 0 and 1 unused), or None for degenerate curves.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    num_bins = 1 << int(np.ceil(np.log2(max(4 * max_order, 256))))
+    signature = _angular_signature(points - np.mean(points, axis=0), num_bins)
+    if signature is None:
+        return None
+    energy = np.abs(np.fft.rfft(signature)) ** 2
+    energy[0] = 0.0
+    total = energy.sum()
+    scores = np.zeros(max_order + 1)
+    for order in range(2, max_order + 1):
+        scores[order] = energy[order::order].sum() / total if total > 0 else 1.0
+    return scores
+
+def find_rotational_symmetry(points, threshold=0.1, max_order=8, method='fft', num_candidates=3,
+                             spectral_tolerance=0.9):
     """
     Find rotational symmetry in a set of points.
     Returns the order of rotational symmetry (2 for 180°, 3 for 120°, 4 for 90°, etc.).
+    The default 'fft' method ranks orders from the Fourier spectrum of the curve's
+    angular signature. Orders scoring within spectral_tolerance of the best are
+    verified with a KD-tree from the largest down, at most num_candidates of
+    them, and the first verified order is returned. 'exhaustive' scores every order up to
+    max_order and returns the best scoring one.
     """
+    points = np.asarray(points, dtype=np.float64)
     center = np.mean(points, axis=0)
     centered_points = points - center
+    tree = cKDTree(centered_points)
+
+    if method == 'exhaustive':
+        orders = range(2, max_order + 1)
+    elif method == 'fft':
+        # With max_order below 2 there is no order to try
+        spectrum = rotational_order_spectrum(points, max_order) if max_order >= 2 else None
+        if spectrum is None:
+            return 1
+        # Divisors of the true order score as high as the order itself, so keep the
+        # orders close to the best score and try the largest ones first
+        best_spectrum = spectrum[2:].max()
+        close = [order for order in range(2, max_order + 1) if spectrum[order] >= spectral_tolerance * best_spectrum]
+        orders = sorted(close, reverse=True)[:num_candidates]
+    else:
+        raise ValueError(f"Unknown rotational symmetry method: {method}")
+
+    if method == 'fft':
+        for order in orders:
+            if _rotation_score(tree, centered_points, order) < threshold:
+                return order
+        return 1
 
     best_order = 1
     best_score = float('inf')
 
-    for order in range(2, max_order + 1):
-        angle = 2 * np.pi / order
-        rotation_matrix = np.array([
-            [np.cos(angle), -np.sin(angle)],
-            [np.sin(angle), np.cos(angle)]
-        ])
-        
-        rotated_points = np.dot(centered_points, rotation_matrix.T)
-        distances = cdist(centered_points, rotated_points)
-        min_distances = np.min(distances, axis=1)
-        
-        score = np.mean(min_distances)
+    for order in orders:
+        score = _rotation_score(tree, centered_points, order)
         
         if score < best_score:
             best_score = score
@@ -70,21 +184,21 @@ def detect_symmetry(regularized_curve):
     params = regularized_curve['params']
 
     if curve_type == 'line':
-        return {'reflection': True, 'rotation': 2}
+        return Symmetry(True, 2)
     elif curve_type == 'circle':
-        return {'reflection': True, 'rotation': float('inf')}
+        return Symmetry(True, float('inf'))
     elif curve_type == 'ellipse':
         xc, yc, a, b, theta = params
         if np.isclose(a, b):
-            return {'reflection': True, 'rotation': float('inf')}
+            return Symmetry(True, float('inf'))
         else:
-            return {'reflection': True, 'rotation': 2}
+            return Symmetry(True, 2)
     elif curve_type == 'rectangle':
         cx, cy, width, height, angle = params
         if np.isclose(width, height):
-            return {'reflection': True, 'rotation': 4}
+            return Symmetry(True, 4)
         else:
-            return {'reflection': True, 'rotation': 2}
+            return Symmetry(True, 2)
     elif curve_type == 'unknown':
         # For unknown curves, we need to analyze the points
         points = regularized_curve.get('points')
@@ -92,14 +206,11 @@ def detect_symmetry(regularized_curve):
             points = np.array(points)
             reflection_symmetry = find_reflection_symmetry(points)
             rotational_symmetry = find_rotational_symmetry(points)
-            return {
-                'reflection': reflection_symmetry is not None,
-                'rotation': rotational_symmetry
-            }
+            return Symmetry(reflection_symmetry is not None, rotational_symmetry)
         else:
-            return {'reflection': False, 'rotation': 1}
+            return Symmetry(False, 1)
     else:
-        return {'reflection': False, 'rotation': 1}
+        return Symmetry(False, 1)
 
 def process_symmetry(regularized_paths):
     """
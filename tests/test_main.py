@@ -0,0 +1,25 @@
+# File: tests/test_main.py
+
+import os
+import sys
+import shutil
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+from main import process_batch, batch_output_dirs
+
+def test_batch_output_dirs_mirror_the_inputs():
+    assert batch_output_dirs(['scans/a/x.png', 'scans/b/x.png', 'scans/y.png'], 'out') == \
+        [os.path.join('out', 'a'), os.path.join('out', 'b'), 'out']
+    assert batch_output_dirs(['scans/x.png', 'scans/y.png'], 'out') == ['out', 'out']
+
+def test_batch_keeps_images_with_the_same_name(tmp_path):
+    for name in ('a', 'b'):
+        os.makedirs(tmp_path / 'scans' / name)
+        shutil.copy(os.path.join(REPO, 'png', 'simplify.png'), tmp_path / 'scans' / name / 'drawing.png')
+    output_dir = tmp_path / 'out'
+    summary = process_batch([str(tmp_path / 'scans')], str(output_dir), workers=2, verbose=False, renderer='svg')
+    assert summary['succeeded'] == 2
+    for name in ('a', 'b'):
+        assert os.path.exists(output_dir / name / 'drawing_results.svg')
@@ -0,0 +1,34 @@
+# File: tests/test_symmetry_detection.py
+
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from symmetry_detection import find_reflection_symmetry, find_rotational_symmetry
+
+def _star(num_points, angle=0.0, radius=40.0):
+    """Vertices of a star with num_points tips, without repeating the first vertex."""
+    t = np.arange(2 * num_points) * np.pi / num_points + angle
+    r = np.where(np.arange(2 * num_points) % 2 == 0, radius, 0.45 * radius)
+    return np.column_stack([r * np.cos(t), r * np.sin(t)]) + [100.0, 50.0]
+
+def test_rotational_symmetry_without_orders_to_try():
+    star = _star(4)
+    assert find_rotational_symmetry(star) == 4
+    for max_order in (-2, 0, 1):
+        assert find_rotational_symmetry(star, max_order=max_order) == 1
+        assert find_rotational_symmetry(star, max_order=max_order, method='exhaustive') == 1
+
+def test_reflection_axis_of_rotated_star():
+    for angle in (0.0, 0.3, 0.7, 1.1):
+        star = _star(8, angle)
+        axis = find_reflection_symmetry(star)
+        assert axis is not None
+        # The axis passes through the centre, along a tip or between two tips
+        a, b, c = axis
+        assert abs(a * 100.0 + b * 50.0 + c) < 1e-6
+        axis_angle = np.arctan2(-a, b) if abs(b) > 1e-12 else np.pi / 2
+        steps = (axis_angle - angle) / (np.pi / 8)
+        assert abs(steps - np.round(steps)) * np.pi / 8 < 0.01
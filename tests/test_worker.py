@@ -0,0 +1,46 @@
+# File: tests/test_worker.py
+
+import os
+import sys
+import time
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from worker import WorkerPool
+
+def _crashing_task(job, cache_options=None):
+    """Stand-in for _run_job whose 'crash' jobs kill their worker process."""
+    if job.get('crash'):
+        os._exit(1)
+    time.sleep(0.1)
+    return {'path': job['png_path'], 'ok': True, 'error': None, 'num_paths': 0, 'seconds': 0.1}
+
+def _run(pool, jobs):
+    results, finished = {}, threading.Condition()
+
+    def respond(result):
+        with finished:
+            results[result['id']] = result
+            finished.notify_all()
+
+    for job in jobs:
+        pool.submit(job, respond)
+    with finished:
+        assert finished.wait_for(lambda: len(results) == len(jobs), timeout=120)
+    return results
+
+def test_worker_crash_fails_only_its_job():
+    pool = WorkerPool(workers=2, task=_crashing_task)
+    try:
+        jobs = [{'id': i, 'png_path': f"{i}.png", 'crash': i == 2} for i in range(6)]
+        results = _run(pool, jobs)
+        assert not results[2]['ok']
+        assert 'BrokenProcessPool' in results[2]['error']
+        assert all(results[i]['ok'] for i in range(6) if i != 2)
+
+        # The pool keeps serving jobs after the crash
+        later = _run(pool, [{'id': i, 'png_path': f"{i}.png"} for i in range(6, 10)])
+        assert all(result['ok'] for result in later.values())
+    finally:
+        pool.close()
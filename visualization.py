@@ -12,28 +12,29 @@ import matplotlib.pyplot as plt
 import numpy as np
 import os
 
-def plot_curve(ax, curve, color='b', label=None):
+from matplotlib.collections import LineCollection
+import re
+import cv2
+import svgwrite
+
+from curve_sampling import DEFAULT_TOLERANCE, sample_curve, sample_curves
+
+RENDERERS = ('plot', 'collections', 'svg', 'raster')
+RENDERER_EXTENSIONS = {'plot': '.png', 'collections': '.png', 'svg': '.svg', 'raster': '.png'}
+COLORS = {'r': (220, 20, 20), 'g': (0, 128, 0), 'b': (20, 20, 220), 'm': (190, 0, 190)}
+FIGURE_SIZE = (12, 8)
+
+def _silent(*args, **kwargs):
+    pass
+
+def plot_curve(ax, curve, color='b', label=None, verbose=True):
     """Plot a single curve on the given axes."""
     try:
-        print(f"Plotting curve of type: {curve['type']}")
-        if curve['type'] == 'line':
-            a, b, c = curve['params']
-            x = np.linspace(min(curve['points'][:, 0]), max(curve['points'][:, 0]), 100)
-            y = (-a*x - c) / b
-            ax.plot(x, y, color, label=label)
-        elif curve['type'] in ['circle', 'ellipse']:
-            if curve['type'] == 'circle':
-                center, radius = curve['params'][0:2], curve['params'][2]
-                angle = np.linspace(0, 2*np.pi, 100)
-                x = center[0] + radius * np.cos(angle)
-                y = center[1] + radius * np.sin(angle)
-            else:  # ellipse
-                center, axes, angle = curve['params'][0:2], curve['params'][2:4], curve['params'][4]
-                t = np.linspace(0, 2*np.pi, 100)
-                a, b = axes
-                x = center[0] + a*np.cos(t)*np.cos(angle) - b*np.sin(t)*np.sin(angle)
-                y = center[1] + a*np.cos(t)*np.sin(angle) + b*np.sin(t)*np.cos(angle)
-            ax.plot(x, y, color, label=label)
+        if verbose:
+            print(f"Plotting curve of type: {curve['type']}")
+        if curve['type'] in ['line', 'circle', 'ellipse', 'arc', 'elliptic_arc']:
+            outline = sample_curve(curve)
+            ax.plot(outline[:, 0], outline[:, 1], color, label=label)
         elif curve['type'] == 'rectangle':
             center, (width, height), angle = curve['params'][0:2], curve['params'][2:4], curve['params'][4]
             rect = plt.Rectangle(center, width, height, angle=np.degrees(angle), 
@@ -44,6 +45,8 @@ def plot_curve(ax, curve, color='b', label=None):
                 ax.plot(curve['completed_points'][:, 0], curve['completed_points'][:, 1], color, label=label)
             else:
                 print(f"Warning: No completed points for curve {label}")
+        elif curve['type'] == 'bridge':
+            ax.plot(curve['completed_points'][:, 0], curve['completed_points'][:, 1], color, label=label)
         elif curve['type'] == 'unknown':
             if 'points' in curve and curve['points'] is not None:
                 ax.plot(curve['points'][:, 0], curve['points'][:, 1], color, label=label)
@@ -51,44 +54,164 @@ def plot_curve(ax, curve, color='b', label=None):
                 print(f"Warning: No points for unknown curve {label}")
         else:
             print(f"Warning: Unknown curve type '{curve['type']}' for curve {label}")
-        print(f"Successfully plotted curve of type: {curve['type']}")
+        if verbose:
+            print(f"Successfully plotted curve of type: {curve['type']}")
     except Exception as e:
         print(f"Error plotting curve of type {curve['type']}: {str(e)}")
 
-def visualize_results(completed_paths, output_path):
-    """Visualize the results of curve detection, regularization, and completion."""
-    print(f"Starting visualization of results. Output path: {output_path}")
+def _group_outlines(entries, tolerance):
+    """Sample (key, curve) entries in one batch and group the drawable outlines by key."""
+    outlines = sample_curves([curve for _, curve in entries], tolerance).to_polylines()
+    groups = {}
+    for (key, _), outline in zip(entries, outlines):
+        if len(outline) > 1:
+            groups.setdefault(key, []).append(outline)
+    return groups
+
+def _group_results(completed_paths, tolerance=DEFAULT_TOLERANCE):
+    """Outlines grouped by (label, color) in the layout used by visualize_results."""
+    entries = []
+    for path in completed_paths:
+        for curve in path:
+            if curve['type'] == 'completed':
+                entries += [(('Completed', 'r'), curve), (('Original', 'b'), curve['original'])]
+            elif curve['type'] == 'bridge':
+                entries.append((('Bridge', 'm'), curve))
+            else:
+                entries.append(((curve['type'].capitalize(), 'g'), curve))
+    return _group_outlines(entries, tolerance)
+
+def _group_symmetry(completed_paths, symmetry_results, tolerance=DEFAULT_TOLERANCE):
+    """Outlines grouped by (label, color) in the layout used by visualize_symmetry."""
+    entries = []
+    for path, path_symmetry in zip(completed_paths, symmetry_results):
+        for curve, symmetry in zip(path, path_symmetry):
+            if symmetry['reflection']:
+                key = ('Reflection Symmetry', 'r')
+            elif symmetry['rotation'] > 1:
+                key = (f'Rotational Symmetry (Order {symmetry["rotation"]})', 'g')
+            else:
+                key = ('No Symmetry', 'b')
+            entries.append((key, curve))
+    return _group_outlines(entries, tolerance)
+
+def _bounds(groups):
+    outlines = [outline for outlines in groups.values() for outline in outlines]
+    if not outlines:
+        return np.zeros(2), np.ones(2)
+    points = np.concatenate(outlines)
+    return points.min(axis=0), points.max(axis=0)
+
+def _render_collections(groups, output_path, title, dpi):
+    """One LineCollection and one legend entry per group."""
+    fig, ax = plt.subplots(figsize=FIGURE_SIZE)
+    for (label, color), outlines in groups.items():
+        ax.add_collection(LineCollection(outlines, colors=color, label=label, linewidths=1))
+    ax.autoscale_view()
+    ax.set_aspect('equal', 'datalim')
+    if groups:
+        ax.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
+    ax.set_title(title)
+    fig.savefig(output_path, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+
+def _render_svg(groups, output_path, title, dpi):
+    """Write one SVG polyline group per (label, color), with y pointing up as in the plots."""
+    (xmin, ymin), (xmax, ymax) = _bounds(groups)
+    margin = 0.02 * max(xmax - xmin, ymax - ymin, 1.0)
+    width, height = xmax - xmin + 2*margin, ymax - ymin + 2*margin
+    drawing = svgwrite.Drawing(output_path, size=(f"{FIGURE_SIZE[0]}in", f"{FIGURE_SIZE[0] * height / width}in"),
+                               viewBox=f"0 0 {width} {height}", debug=False)
+    drawing.set_desc(title=title)
+    for (label, color), outlines in groups.items():
+        group = drawing.add(drawing.g(id=re.sub(r'\W+', '_', label).strip('_'), fill='none',
+                                      stroke=f"rgb{COLORS[color]}", stroke_width=width / (FIGURE_SIZE[0] * dpi) * 2))
+        group.set_desc(title=label)
+        for outline in outlines:
+            points = np.column_stack([outline[:, 0] - xmin + margin, ymax + margin - outline[:, 1]])
+            group.add(drawing.polyline(np.round(points, 3).tolist()))
+    drawing.save()
+
+def _render_raster(groups, output_path, title, dpi):
+    """Draw the groups with cv2.polylines on a white canvas FIGURE_SIZE[0] * dpi pixels wide."""
+    (xmin, ymin), (xmax, ymax) = _bounds(groups)
+    canvas_width = int(FIGURE_SIZE[0] * dpi)
+    scale = (canvas_width - 20) / max(xmax - xmin, ymax - ymin, 1e-9)
+    canvas_height = int((ymax - ymin) * scale) + 20 + 24 * (len(groups) + 1)
+    canvas = np.full((canvas_height, canvas_width, 3), 255, dtype=np.uint8)
+    cv2.putText(canvas, title, (10, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 1, cv2.LINE_AA)
+    for i, ((label, color), outlines) in enumerate(groups.items()):
+        bgr = COLORS[color][::-1]
+        strokes = [np.round(np.column_stack([(outline[:, 0] - xmin) * scale + 10,
+                                             (ymax - outline[:, 1]) * scale + 10 + 24 * (len(groups) + 1)]))
+                   .astype(np.int32) for outline in outlines]
+        cv2.polylines(canvas, strokes, isClosed=False, color=bgr, thickness=1, lineType=cv2.LINE_AA)
+        cv2.putText(canvas, label, (10, 20 + 24 * (i + 1)), cv2.FONT_HERSHEY_SIMPLEX, 0.6, bgr, 1, cv2.LINE_AA)
+    if not cv2.imwrite(output_path, canvas):
+        raise ValueError(f"Could not write image to {output_path}")
+
+_GROUP_RENDERERS = {'collections': _render_collections, 'svg': _render_svg, 'raster': _render_raster}
+
+def render_groups(groups, output_path, title, renderer='collections', dpi=100):
+    """Render grouped outlines with one of the batched renderers."""
+    if renderer not in _GROUP_RENDERERS:
+        raise ValueError(f"Unknown renderer: {renderer}")
+    _GROUP_RENDERERS[renderer](groups, output_path, title, dpi)
+
+def visualize_results(completed_paths, output_path, verbose=True, renderer='plot', dpi=300):
+    """
+    Visualize the results of curve detection, regularization, and completion.
+    renderer='plot' draws and labels every curve separately; 'collections',
+    'svg' and 'raster' draw one batch per curve type with a legend by type.
+    """
+    log = print if verbose else _silent
+    log(f"Starting visualization of results. Output path: {output_path}")
     try:
+        if renderer != 'plot':
+            render_groups(_group_results(completed_paths), output_path,
+                          'Curve Detection, Regularization, and Completion Results', renderer, dpi)
+            log(f"Results visualization saved to {output_path}")
+            return
         fig, ax = plt.subplots(figsize=(12, 8))
         
         for i, path in enumerate(completed_paths):
-            print(f"Processing path {i+1} of {len(completed_paths)}")
+            log(f"Processing path {i+1} of {len(completed_paths)}")
             for j, curve in enumerate(path):
                 if curve['type'] == 'completed':
-                    plot_curve(ax, curve, color='r', label=f'Completed (Path {i+1}, Curve {j+1})')
-                    plot_curve(ax, curve['original'], color='b', label=f'Original (Path {i+1}, Curve {j+1})')
+                    plot_curve(ax, curve, color='r', label=f'Completed (Path {i+1}, Curve {j+1})', verbose=verbose)
+                    plot_curve(ax, curve['original'], color='b', label=f'Original (Path {i+1}, Curve {j+1})',
+                               verbose=verbose)
+                elif curve['type'] == 'bridge':
+                    plot_curve(ax, curve, color='m', label=f'Bridge (Path {i+1}, Curve {j+1})', verbose=verbose)
                 else:
-                    plot_curve(ax, curve, color='g', label=f'{curve["type"].capitalize()} (Path {i+1}, Curve {j+1})')
+                    plot_curve(ax, curve, color='g', label=f'{curve["type"].capitalize()} (Path {i+1}, Curve {j+1})',
+                               verbose=verbose)
 
         ax.set_aspect('equal', 'box')
         ax.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
         ax.set_title('Curve Detection, Regularization, and Completion Results')
         plt.tight_layout()
-        print(f"Saving figure to {output_path}")
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
+        log(f"Saving figure to {output_path}")
+        plt.savefig(output_path, dpi=dpi, bbox_inches='tight')
         plt.close(fig)
-        print(f"Results visualization saved to {output_path}")
+        log(f"Results visualization saved to {output_path}")
     except Exception as e:
         print(f"Error in visualize_results: {str(e)}")
 
-def visualize_symmetry(completed_paths, symmetry_results, output_path):
-    """Visualize the symmetry detection results."""
-    print(f"Starting visualization of symmetry. Output path: {output_path}")
+def visualize_symmetry(completed_paths, symmetry_results, output_path, verbose=True, renderer='plot', dpi=300):
+    """Visualize the symmetry detection results, with renderer as in visualize_results."""
+    log = print if verbose else _silent
+    log(f"Starting visualization of symmetry. Output path: {output_path}")
     try:
+        if renderer != 'plot':
+            render_groups(_group_symmetry(completed_paths, symmetry_results), output_path,
+                          'Symmetry Detection Results', renderer, dpi)
+            log(f"Symmetry visualization saved to {output_path}")
+            return
         fig, ax = plt.subplots(figsize=(12, 8))
         
         for i, (path, path_symmetry) in enumerate(zip(completed_paths, symmetry_results)):
-            print(f"Processing path {i+1} of {len(completed_paths)}")
+            log(f"Processing path {i+1} of {len(completed_paths)}")
             for curve, symmetry in zip(path, path_symmetry):
                 if symmetry['reflection']:
                     color = 'r'
@@ -100,16 +223,16 @@ def visualize_symmetry(completed_paths, symmetry_results, output_path):
                     color = 'b'
                     label = 'No Symmetry'
                 
-                plot_curve(ax, curve, color=color, label=label)
+                plot_curve(ax, curve, color=color, label=label, verbose=verbose)
 
         ax.set_aspect('equal', 'box')
         ax.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
         ax.set_title('Symmetry Detection Results')
         plt.tight_layout()
-        print(f"Saving figure to {output_path}")
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
+        log(f"Saving figure to {output_path}")
+        plt.savefig(output_path, dpi=dpi, bbox_inches='tight')
         plt.close(fig)
-        print(f"Symmetry visualization saved to {output_path}")
+        log(f"Symmetry visualization saved to {output_path}")
     except Exception as e:
         print(f"Error in visualize_symmetry: {e}")
 
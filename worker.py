@@ -0,0 +1,260 @@
+# File: worker.py
+"""
+Long-lived worker that keeps the pipeline warm between images.
+
+Jobs are JSON objects, one per line, read from stdin or from connections to a
+Unix socket. Each job runs process_image in a pool of worker processes that
+import OpenCV, SciPy, scikit-image and matplotlib and check ximgproc once at
+startup. Each result is written back as one JSON line in completion order,
+tagged with the job's id.
+
+    {"id": 1, "png_path": "png/simplify.png", "output_dir": "output", "renderer": "raster"}
+    -> {"id": 1, "path": "png/simplify.png", "ok": true, "error": null, "num_paths": 3, "seconds": 0.21}
+
+Optional job fields are save_polylines, tile_size, method, renderer, dpi,
+epsilon, dedup_tolerance, threshold, segment_tolerance and profile, which is
+a JSON lines file for per-stage profiling records. With --cache-dir all jobs
+share a StageCache. The {"op": "ping"} request answers immediately.
+{"op": "shutdown"} stops the socket server once running jobs finish. A job
+whose worker process dies is answered as failed; the other jobs are rerun.
+
+At most max_pending jobs are queued or running. Further input is not read
+until a slot frees up, so clients see backpressure through the pipe or socket.
+
+    python worker.py --workers 4 < jobs.jsonl
+    python worker.py --socket /tmp/curves.sock
+"""
+
+import os
+import sys
+import json
+import argparse
+import threading
+import socketserver
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from main import _process_image_task
+from png_processor import test_ximgproc
+from stage_cache import DEFAULT_CACHE_BYTES
+
+JOB_OPTIONS = ('save_polylines', 'tile_size', 'method', 'renderer', 'dpi', 'epsilon', 'dedup_tolerance',
+               'threshold', 'segment_tolerance')
+
+def _warm_up():
+    """Pool initializer: keep stray prints off the protocol stream and run the ximgproc check once."""
+    sys.stdout = sys.stderr
+    test_ximgproc(verbose=False)
+
+def _run_job(job, cache_options=None):
+    options = {key: job[key] for key in JOB_OPTIONS if key in job}
+    profile_options = {'jsonl_path': job['profile']} if job.get('profile') else None
+    return _process_image_task(job['png_path'], job.get('output_dir', 'output'), verbose=False,
+                               profile_options=profile_options, cache_options=cache_options, **options)
+
+class WorkerPool:
+    """
+    Process pool with a bound on queued plus running jobs. task(job,
+    cache_options) runs in the workers and returns the result dict.
+
+    A worker that dies breaks the whole ProcessPoolExecutor and fails every
+    job in it. The pool is then replaced for later jobs, and each failed job
+    is rerun alone in a one-process pool, so only the job that crashed is
+    reported as failed.
+    """
+
+    def __init__(self, workers=None, max_pending=None, cache_options=None, task=_run_job):
+        self.workers = workers or os.cpu_count() or 1
+        self.cache_options = cache_options
+        self.task = task
+        self.lock = threading.Lock()
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_up)
+        self.slots = threading.BoundedSemaphore(max_pending or 2 * self.workers)
+
+    def submit(self, job, respond):
+        """Queue a job and call respond(result) when it finishes; blocks while the pool is full."""
+        if not isinstance(job, dict) or not isinstance(job.get('png_path'), str):
+            respond({'id': job.get('id') if isinstance(job, dict) else None, 'ok': False,
+                     'error': "job needs a png_path"})
+            return
+        self.slots.acquire()
+        with self.lock:
+            executor = self.executor
+        try:
+            try:
+                future = executor.submit(self.task, job, self.cache_options)
+            except BrokenProcessPool:
+                executor = self._replace(executor)
+                future = executor.submit(self.task, job, self.cache_options)
+        except Exception as e:
+            self._finish(job, respond, {'ok': False, 'error': f"{type(e).__name__}: {str(e)}"})
+            return
+
+        def done(future):
+            try:
+                result = future.result()
+            except BrokenProcessPool:
+                # Some worker died; this job may or may not be the one that crashed
+                self._replace(executor)
+                threading.Thread(target=self._rerun_alone, args=(job, respond), daemon=True).start()
+                return
+            except Exception as e:
+                result = self._failure(job, e)
+            self._finish(job, respond, result)
+
+        future.add_done_callback(done)
+
+    def _replace(self, broken):
+        """Swap a broken executor for a new one, once, and return the current executor."""
+        with self.lock:
+            if self.executor is broken:
+                self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_up)
+                broken.shutdown(wait=False)
+            return self.executor
+
+    def _rerun_alone(self, job, respond):
+        executor = ProcessPoolExecutor(max_workers=1, initializer=_warm_up)
+        try:
+            result = executor.submit(self.task, job, self.cache_options).result()
+        except Exception as e:
+            result = self._failure(job, e)
+        finally:
+            executor.shutdown(wait=False)
+        self._finish(job, respond, result)
+
+    @staticmethod
+    def _failure(job, error):
+        # Only reached when a worker process dies; process_image errors are reported in the result
+        return {'path': job['png_path'], 'ok': False, 'num_paths': 0, 'seconds': None,
+                'error': f"{type(error).__name__}: {str(error)}"}
+
+    def _finish(self, job, respond, result):
+        self.slots.release()
+        respond({'id': job.get('id'), **result})
+
+    def close(self):
+        with self.lock:
+            executor = self.executor
+        executor.shutdown(wait=True)
+
+def serve_lines(pool, lines, write):
+    """
+    Handle one stream of request lines and write one response line per job.
+    Returns True if a shutdown was requested. Waits for the stream's jobs to
+    be answered before returning.
+    """
+    lock = threading.Lock()
+    answered = threading.Condition()
+    outstanding = [0]
+
+    def respond(message):
+        with lock:
+            write(json.dumps(message, default=str) + '\n')
+
+    def respond_job(message):
+        # Counted after the write, so the stream stays open until every job has answered
+        try:
+            respond(message)
+        finally:
+            with answered:
+                outstanding[0] -= 1
+                answered.notify_all()
+
+    def wait_for_jobs():
+        with answered:
+            answered.wait_for(lambda: outstanding[0] == 0)
+
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            job = json.loads(line)
+        except ValueError as e:
+            respond({'id': None, 'ok': False, 'error': f"invalid JSON: {str(e)}"})
+            continue
+        op = job.get('op', 'process') if isinstance(job, dict) else 'process'
+        if op == 'ping':
+            respond({'id': job.get('id'), 'ok': True, 'workers': pool.workers})
+        elif op == 'shutdown':
+            wait_for_jobs()
+            respond({'id': job.get('id'), 'ok': True})
+            return True
+        elif op == 'process':
+            with answered:
+                outstanding[0] += 1
+            pool.submit(job, respond_job)
+        else:
+            respond({'id': job.get('id'), 'ok': False, 'error': f"unknown op: {op}"})
+    wait_for_jobs()
+    return False
+
+def serve_stdin(pool):
+    """Read jobs from stdin until EOF, writing results to stdout."""
+    out = sys.stdout
+    # Anything printed by the pipeline in this process goes to stderr instead of the results
+    sys.stdout = sys.stderr
+
+    def write(text):
+        out.write(text)
+        out.flush()
+
+    serve_lines(pool, sys.stdin, write)
+
+def serve_socket(pool, socket_path):
+    """Accept any number of client connections on a Unix socket, each speaking the line protocol."""
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            def write(text):
+                self.wfile.write(text.encode())
+                self.wfile.flush()
+
+            lines = (line.decode() for line in self.rfile)
+            try:
+                if serve_lines(pool, lines, write):
+                    threading.Thread(target=self.server.shutdown).start()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    server = socketserver.ThreadingUnixStreamServer(socket_path, Handler)
+    server.daemon_threads = True
+    print(f"Worker listening on {socket_path} with {pool.workers} processes", file=sys.stderr)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        os.unlink(socket_path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--socket', help="Listen on this Unix socket path instead of reading stdin")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="Number of worker processes (default: CPU count)")
+    parser.add_argument('--max-pending', type=int, default=None,
+                        help="Queued plus running jobs before input is throttled (default: twice the workers)")
+    parser.add_argument('--cache-dir', default=None, help="Share a stage cache in this directory across jobs")
+    parser.add_argument('--cache-size-mb', type=float, default=DEFAULT_CACHE_BYTES / 2**20,
+                        help="Evict least recently used cache entries beyond this size")
+    args = parser.parse_args(argv)
+
+    if not test_ximgproc(verbose=False):
+        return 1
+    cache_options = None
+    if args.cache_dir:
+        cache_options = {'cache_dir': args.cache_dir, 'max_bytes': int(args.cache_size_mb * 2**20)}
+    pool = WorkerPool(args.workers, args.max_pending, cache_options)
+    try:
+        if args.socket:
+            serve_socket(pool, args.socket)
+        else:
+            serve_stdin(pool)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())